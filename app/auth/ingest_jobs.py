@@ -0,0 +1,75 @@
+from datetime import datetime, timezone
+from typing import List, Optional
+import uuid
+
+from sqlalchemy.orm import Session
+from app.models.ingest_jobs import IngestJob, IngestJobItem
+
+def create_ingest_job(
+    db: Session,
+    username: str,
+    video_ids: List[str],
+    force: bool = False,
+    worker_id: Optional[str] = None,
+) -> IngestJob:
+    job = IngestJob(
+        id=uuid.uuid4().hex,
+        username=username,
+        items=[
+            IngestJobItem(video_id=video_id, status="queued", force=force, worker_id=worker_id)
+            for video_id in video_ids
+        ],
+    )
+    db.add(job)
+    db.commit()
+
+    db.refresh(job)
+    return job
+
+def get_ingest_job(db: Session, job_id: str, username: str) -> Optional[IngestJob]:
+    return (
+        db.query(IngestJob)
+        .filter_by(
+            id=job_id,
+            username=username,
+        )
+        .first()
+    )
+
+def update_ingest_job_item(
+    db: Session,
+    item_id: int,
+    status: str,
+    chunks_added: Optional[int] = None,
+    error: Optional[str] = None,
+):
+    item = db.get(IngestJobItem, item_id)
+    if item is None:
+        return None
+
+    now = datetime.now(timezone.utc)
+    item.status = status
+    if status == "running":
+        item.started_at = now
+    else:
+        item.finished_at = now
+        item.chunks_added = chunks_added
+        item.error = error
+
+    db.commit()
+    return item
+
+def get_unfinished_ingest_job_items(db: Session) -> List[IngestJobItem]:
+    return (
+        db.query(IngestJobItem)
+        .filter(IngestJobItem.status.in_(["queued", "running"]))
+        .order_by(IngestJobItem.id)
+        .all()
+    )
+
+def requeue_ingest_job_items(db: Session, items: List[IngestJobItem], worker_id: str) -> None:
+    for item in items:
+        item.status = "queued"
+        item.started_at = None
+        item.worker_id = worker_id
+    db.commit()
@@ -1,3 +1,6 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+from sqlalchemy import bindparam, update
 from sqlalchemy.orm import Session
 from app.models.ingested_data import YouTubeIngestion
 
@@ -11,6 +14,73 @@ def get_ingestion_metadata(db: Session, video_id: str, language: str):
         .first()
     )
 
+def get_ingested_video_ids(db: Session, video_ids, language: str = "en") -> set:
+    rows = (
+        db.query(YouTubeIngestion.video_id)
+        .filter(
+            YouTubeIngestion.video_id.in_(list(video_ids)),
+            YouTubeIngestion.language == language,
+        )
+        .all()
+    )
+    return {row.video_id for row in rows}
+
+def get_ingestion_last_used(db: Session) -> Dict[str, datetime]:
+    """
+    Last access (or ingestion) time per video, in UTC.
+    """
+    rows = db.query(
+        YouTubeIngestion.video_id,
+        YouTubeIngestion.last_accessed_at,
+        YouTubeIngestion.ingested_at,
+    ).all()
+
+    last_used: Dict[str, datetime] = {}
+    for row in rows:
+        when = row.last_accessed_at or row.ingested_at
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        last_used[row.video_id] = max(when, last_used.get(row.video_id, when))
+    return last_used
+
+def record_video_access(db: Session, accessed: Dict[str, datetime]) -> None:
+    """
+    Stores buffered access times with a single executemany UPDATE.
+    """
+    if not accessed:
+        return
+    table = YouTubeIngestion.__table__
+    db.execute(
+        update(table)
+        .where(table.c.video_id == bindparam("accessed_video_id"))
+        .values(last_accessed_at=bindparam("accessed_at")),
+        [
+            {"accessed_video_id": video_id, "accessed_at": accessed_at}
+            for video_id, accessed_at in accessed.items()
+        ],
+    )
+    db.commit()
+
+def delete_ingestion_metadata(db: Session, video_id: str) -> None:
+    db.query(YouTubeIngestion).filter(YouTubeIngestion.video_id == video_id).delete()
+    db.commit()
+
+def is_ingestion_fresh(record, max_age_seconds: int) -> bool:
+    if record is None or record.verified_at is None or max_age_seconds <= 0:
+        return False
+
+    verified_at = record.verified_at
+    if verified_at.tzinfo is None:
+        # SQLite hands back naive datetimes; they are stored in UTC.
+        verified_at = verified_at.replace(tzinfo=timezone.utc)
+
+    return datetime.now(timezone.utc) - verified_at < timedelta(seconds=max_age_seconds)
+
+def mark_ingestion_verified(db: Session, record):
+    record.verified_at = datetime.now(timezone.utc)
+    db.commit()
+    return record
+
 def upsert_ingestion_metadata(
     db: Session,
     video_id: str,
@@ -33,5 +103,6 @@ def upsert_ingestion_metadata(
         )
         db.add(record)
 
-    db.flush()
+    record.verified_at = datetime.now(timezone.utc)
+    db.commit()
     return record
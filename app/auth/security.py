@@ -1,4 +1,11 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+import asyncio
+import threading
+import time
+
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
@@ -9,12 +16,97 @@ settings = get_settings()
 
 pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
 
+class TokenCache:
+    """
+    LRU of verified tokens -> (subject, exp as a unix timestamp). Entries
+    are dropped once the token expires.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return entry[0]
+
+    def put(self, token: str, subject: str, expires_at: float) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[token] = (subject, expires_at)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class PasswordHasherPool:
+    """
+    Dedicated thread pool for argon2 (which releases the GIL), so hashing
+    bursts don't occupy the request threadpool. At most `workers +
+    max_pending` tasks are accepted; beyond that callers get a 503.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers),
+            thread_name_prefix="password-hash",
+        )
+        self._slots = threading.BoundedSemaphore(max(1, workers) + max(0, max_pending))
+
+    async def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+_token_cache = TokenCache(settings.TOKEN_CACHE_MAX_ENTRIES)
+_hasher_pool = None
+
+def get_hasher_pool() -> PasswordHasherPool:
+    global _hasher_pool
+    if _hasher_pool is None:
+        _hasher_pool = PasswordHasherPool(
+            workers=settings.PASSWORD_HASH_WORKERS,
+            max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+        )
+    return _hasher_pool
+
+def shutdown_hasher_pool():
+    global _hasher_pool
+    if _hasher_pool is not None:
+        _hasher_pool._executor.shutdown(wait=False, cancel_futures=True)
+        _hasher_pool = None
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
+async def hash_password_async(password: str) -> str:
+    return await get_hasher_pool().run(hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    return await get_hasher_pool().run(verify_password, password, hashed)
+
 def create_access_token(subject: str) -> str:
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
@@ -28,15 +120,22 @@ def create_access_token(subject: str) -> str:
     return jwt.encode(payload, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 def decode_token(token: str) -> str:
+    subject = _token_cache.get(token)
+    if subject is not None:
+        return subject
+
     try:
         payload = jwt.decode(
             token,
             settings.JWT_SECRET_KEY,
             algorithms=[settings.JWT_ALGORITHM]
         )
-        return payload["sub"]
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
         )
+
+    if payload.get("exp") is not None:
+        _token_cache.put(token, payload["sub"], float(payload["exp"]))
+    return payload["sub"]
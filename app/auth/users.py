@@ -1,19 +1,27 @@
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
 from app.models.user_db import User
-from app.auth.security import hash_password, verify_password
+from app.auth.security import verify_password_async
 from sqlalchemy.exc import IntegrityError
 
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
-def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+def get_users_by_username_or_email(db: Session, username: str, email: str):
+    # At most one user can match each unique column.
+    return (
+        db.query(User)
+        .filter(or_(User.username == username, User.email == email))
+        .limit(2)
+        .all()
+    )
 
-def create_user(db: Session, username: str, email: str, password: str):
+def create_user(db: Session, username: str, email: str, password_hash: str):
     user = User(
         username=username,
         email=email,
-        password_hash=hash_password(password),
+        password_hash=password_hash,
     )
     db.add(user)
     db.commit()
@@ -21,10 +29,10 @@ def create_user(db: Session, username: str, email: str, password: str):
     db.refresh(user)
     return user
     
-def authenticate_user(db: Session, username: str, password: str):
-    user = get_user_by_username(db, username)
+async def authenticate_user(db: Session, username: str, password: str):
+    user = await run_in_threadpool(get_user_by_username, db, username)
     if not user:
         return None
-    if not verify_password(password, user.password_hash):
+    if not await verify_password_async(password, user.password_hash):
         return None
     return user
\ No newline at end of file
@@ -31,10 +31,104 @@ class Settings(BaseSettings):
         description="Chat history database URL"
     )
 
+    # Vector store layout: "per_video" (one directory per video) or "shared"
+    # (one persist directory, collections sharded by video_id hash)
+    VECTORSTORE_LAYOUT: str = "per_video"
+    VECTORSTORE_SHARDS: int = 16
+
+    # Vector store backend: "chroma" or "flat" (exact search over a per-video
+    # memory-mapped matrix; FLAT_INDEX_DTYPE is float32, float16 or int8)
+    VECTORSTORE_BACKEND: str = "chroma"
+    FLAT_INDEX_DTYPE: str = "float32"
+
+    # Vector store handle pool
+    VECTORSTORE_POOL_SIZE: int = 128
+    VECTORSTORE_POOL_TTL_SECONDS: int = 900
+
+    # Embeddings
+    EMBEDDING_MODEL: str = "embed-v4.0"
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 500_000
+
+    # Ingestion write stage: chunks are embedded in batches, with up to
+    # EMBED_CONCURRENCY requests in flight, each retried with backoff
+    EMBED_BATCH_SIZE: int = 96
+    EMBED_CONCURRENCY: int = 4
+    EMBED_MAX_RETRIES: int = 3
+    EMBED_RETRY_BACKOFF_SECONDS: float = 1.0
+
+    # Outbound HTTP (YouTube APIs)
+    YOUTUBE_API_BASE_URL: str = "https://www.googleapis.com/youtube/v3"
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_MAX_RETRIES: int = 3
+    HTTP_POOL_SIZE: int = 16
+
     # Text Splitter
     CHUNK_SIZE: int = 800
     CHUNK_OVERLAP: int = 180
 
+    # On-disk transcript cache (DATA_DIR/transcripts)
+    TRANSCRIPT_CACHE_TTL_SECONDS: int = 7 * 24 * 60 * 60
+    TRANSCRIPT_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # Videos verified within this window are not re-fetched (0 disables)
+    INGEST_FRESHNESS_SECONDS: int = 6 * 60 * 60
+
+    # Cold video stores: when per-video stores exceed the quota (0 disables),
+    # the least recently chatted-with videos idle for at least
+    # STORE_EVICTION_MIN_IDLE_SECONDS are evicted. Chat access times are
+    # buffered and written every STORE_ACCESS_FLUSH_SECONDS.
+    STORE_DISK_QUOTA_BYTES: int = 0
+    STORE_EVICTION_INTERVAL_SECONDS: int = 600
+    STORE_EVICTION_MIN_IDLE_SECONDS: int = 60 * 60
+    STORE_ACCESS_FLUSH_SECONDS: int = 30
+    # Chatting with an evicted video re-ingests it from the transcript cache,
+    # at most STORE_RESTORE_CONCURRENCY at a time
+    STORE_REINGEST_ON_CHAT: bool = True
+    STORE_RESTORE_CONCURRENCY: int = 4
+
+    # Re-ingest only the chunks that changed instead of delete-all-then-add
+    INGEST_INCREMENTAL: bool = True
+
+    # Batch ingestion worker pool
+    INGEST_JOB_CONCURRENCY: int = 4
+
+    # Reranking of retrieved candidates: "cohere" | "local" | "none"
+    RERANKER: str = "cohere"
+    RERANK_TOP_N: int = 4
+
+    # Retrieval: "dense" (MMR only) or "hybrid" (MMR + per-video BM25, fused)
+    RETRIEVAL_MODE: str = "dense"
+    HYBRID_FETCH_K: int = 12
+    HYBRID_SKIP_RERANK_OVERLAP: float = 0.5
+
+    # Multi-video (playlist) chat: each video's store is searched in
+    # parallel for MULTI_VIDEO_PER_VIDEO_K chunks; the best
+    # MULTI_VIDEO_FETCH_K overall are reranked once
+    CHAT_FANOUT_CONCURRENCY: int = 16
+    MULTI_VIDEO_PER_VIDEO_K: int = 4
+    MULTI_VIDEO_FETCH_K: int = 20
+    PLAYLIST_CACHE_TTL_SECONDS: int = 60 * 60
+
+    # Prompt context budget (estimated tokens)
+    CONTEXT_TOKEN_BUDGET: int = 1500
+
+    # Answer cache (per video and transcript hash)
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_MAX_ENTRIES: int = 4096
+    ANSWER_CACHE_TTL_SECONDS: int = 6 * 60 * 60
+    ANSWER_CACHE_SIMILARITY: float = 0.95
+
+    # Chat streaming
+    CHAT_STREAM_BUFFER: int = 32
+    CHAT_STREAM_IDLE_TIMEOUT_SECONDS: float = 60.0
+    # Send per-stage timings (ms) as a `timing` event before `end`
+    CHAT_TIMING_EVENT: bool = False
+
+    # Load the LLM, reranker, embedding and transcript clients in the
+    # background at startup instead of on the first request
+    PREWARM_ON_STARTUP: bool = False
+
     # Chat History
     MAX_HISTORY_MESSAGES: int = 10
 
@@ -42,6 +136,13 @@ class Settings(BaseSettings):
     JWT_SECRET_KEY: str = Field(..., description="JWT secret key")
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
+    # Verified tokens are cached (until they expire) to skip re-decoding
+    TOKEN_CACHE_MAX_ENTRIES: int = 10_000
+
+    # Password hashing runs on its own bounded pool; requests beyond
+    # workers + max pending are rejected with 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
 
 @lru_cache()
 def get_settings() -> Settings:
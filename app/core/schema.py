@@ -1,13 +1,74 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, field_validator, model_validator
+from datetime import datetime
+from typing import List, Optional
 import re
 
+MAX_BATCH_VIDEOS = 500
+MAX_CHAT_VIDEOS = 100
+
 class YoutubeIngestRequest(BaseModel):
     video_id: str
+    # Re-check YouTube even if the video was verified recently
+    force: bool = False
 
-class ChatRequest(BaseModel):
+class YoutubeBatchIngestRequest(BaseModel):
+    video_ids: List[str]
+    force: bool = False
+
+    @field_validator("video_ids")
+    @classmethod
+    def validate_video_ids(cls, v: List[str]):
+        video_ids = list(dict.fromkeys(x.strip() for x in v if x.strip()))
+        if not video_ids:
+            raise ValueError("At least one video id is required")
+        if len(video_ids) > MAX_BATCH_VIDEOS:
+            raise ValueError(f"At most {MAX_BATCH_VIDEOS} videos can be ingested per batch")
+        return video_ids
+
+class IngestJobItemResponse(BaseModel):
     video_id: str
+    status: str
+    chunks_added: Optional[int] = None
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: str
+    total: int
+    queued: int = 0
+    running: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    items: List[IngestJobItemResponse] = []
+
+class ChatRequest(BaseModel):
+    # Exactly one of: a single video, a list of videos, or a playlist
+    video_id: Optional[str] = None
+    video_ids: Optional[List[str]] = None
+    playlist_id: Optional[str] = None
     question: str
 
+    @field_validator("video_ids")
+    @classmethod
+    def validate_video_ids(cls, v: Optional[List[str]]):
+        if v is None:
+            return v
+        video_ids = list(dict.fromkeys(x.strip() for x in v if x.strip()))
+        if not video_ids:
+            raise ValueError("At least one video id is required")
+        if len(video_ids) > MAX_CHAT_VIDEOS:
+            raise ValueError(f"At most {MAX_CHAT_VIDEOS} videos can be searched at once")
+        return video_ids
+
+    @model_validator(mode="after")
+    def validate_target(self):
+        targets = [self.video_id, self.video_ids, self.playlist_id]
+        if sum(target is not None for target in targets) != 1:
+            raise ValueError("Provide exactly one of video_id, video_ids or playlist_id")
+        return self
+
 class ChatResponse(BaseModel):
     answer: str
 
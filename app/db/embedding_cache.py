@@ -0,0 +1,202 @@
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List
+import hashlib
+import sqlite3
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+# Keeps each lookup under SQLite's bound-parameter limit.
+_LOOKUP_BATCH = 500
+
+# Hits only refresh `last_used` in memory; the buffer is written out once it
+# holds this many keys, this many seconds have passed, or rows are inserted.
+_TOUCH_FLUSH_KEYS = 1000
+_TOUCH_FLUSH_SECONDS = 60.0
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def _pack(vector: Iterable[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+def _unpack(blob: bytes) -> List[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed embedding store.
+
+    Vectors are kept as float32 blobs keyed by (model, input kind, text hash)
+    and the least recently used rows are evicted past `max_entries`. Reads
+    don't write: hit times are buffered and flushed in batches.
+    """
+
+    def __init__(self, path: Path, max_entries: int):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._touched: Dict[tuple, float] = {}
+        self._last_flush = time.monotonic()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, kind, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, model: str, kind: str, hashes: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+
+        with self._lock:
+            for start in range(0, len(hashes), _LOOKUP_BATCH):
+                batch = hashes[start:start + _LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE model = ? AND kind = ? AND text_hash IN ({placeholders})",
+                    (model, kind, *batch),
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = _unpack(blob)
+
+            for key in found:
+                self._touched[(model, kind, key)] = now
+            if found and (
+                len(self._touched) >= _TOUCH_FLUSH_KEYS
+                or time.monotonic() - self._last_flush >= _TOUCH_FLUSH_SECONDS
+            ):
+                self._flush_touched()
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(set(hashes)) - len(found)
+
+        return found
+
+    def put_many(self, model: str, kind: str, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, kind, text_hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(model, kind, key, _pack(vector), now) for key, vector in items.items()],
+            )
+            # Upper bound (replacements are counted too); `_evict` recounts exactly.
+            self._size += len(items)
+            # Eviction orders by last_used, so pending hits must land first.
+            self._flush_touched()
+            self._evict()
+            self._conn.commit()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+
+    def _flush_touched(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used = ? "
+            "WHERE model = ? AND kind = ? AND text_hash = ?",
+            [(when, model, kind, key) for (model, kind, key), when in touched.items()],
+        )
+
+    def _evict(self) -> None:
+        if self.max_entries <= 0 or self._size <= self.max_entries:
+            return
+
+        # Evict down to 90% of the cap so eviction isn't paid on every insert.
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = self._size - int(self.max_entries * 0.9)
+        if excess <= 0:
+            return
+
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE (model, kind, text_hash) IN "
+            "(SELECT model, kind, text_hash FROM embeddings ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self._size -= excess
+        self.evictions += excess
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self._size,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+class CachedEmbeddings(Embeddings):
+    """
+    Read-through cache in front of an embedding model.
+
+    Only texts never seen before for this model are sent upstream.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: EmbeddingCache, model_name: str):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(text) for text in texts]
+        found = self.cache.get_many(self.model_name, "document", hashes)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, "document", fresh)
+            found.update(fresh)
+
+        return [found[key] for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = text_hash(text)
+        found = self.cache.get_many(self.model_name, "query", [key])
+        if key in found:
+            return found[key]
+
+        vector = self.embeddings.embed_query(text)
+        self.cache.put_many(self.model_name, "query", {key: vector})
+        return vector
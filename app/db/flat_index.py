@@ -0,0 +1,492 @@
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+MANIFEST = "index.json"
+DTYPES = ("float32", "float16", "int8")
+REFRESH_ATTEMPTS = 3
+
+def matches(metadata: dict, where: Optional[dict]) -> bool:
+    """
+    Evaluates the subset of Chroma's `where` dialect used by the app:
+    `$and`, `$or`, and per-key `$eq`, `$ne`, `$in`, `$nin` or plain equality.
+    As in Chroma, `$ne`/`$nin` also match chunks that lack the key.
+    """
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for op, operand in condition.items():
+                if op == "$eq":
+                    ok = key in metadata and value == operand
+                elif op == "$ne":
+                    ok = value != operand
+                elif op == "$in":
+                    ok = key in metadata and value in operand
+                elif op == "$nin":
+                    ok = value not in operand
+                else:
+                    raise ValueError(f"Unsupported filter operator: {op}")
+                if not ok:
+                    return False
+        elif key not in metadata or metadata[key] != condition:
+            return False
+    return True
+
+def quantize(matrix: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Returns (stored matrix, per-row scales). int8 uses symmetric per-row
+    scaling; the other types are stored as-is.
+    """
+    if dtype == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0 if len(matrix) else np.zeros(0)
+        scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+        return np.round(matrix / scales[:, None]).astype(np.int8), scales
+    return matrix.astype(dtype), None
+
+class Snapshot:
+    """
+    One immutable generation of a collection. Vectors are memory-mapped;
+    readers keep using the snapshot they started with while a writer
+    publishes the next one.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        vectors: np.ndarray,
+        scales: Optional[np.ndarray],
+        stamp: Any = None,
+    ):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.vectors = vectors
+        self.scales = scales
+        self.stamp = stamp
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(ids)}
+        self._sq_norms = None
+
+    def dense(self, rows=None) -> np.ndarray:
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        dense = np.asarray(vectors, dtype=np.float32)
+        if self.scales is not None:
+            scales = self.scales if rows is None else self.scales[rows]
+            dense = dense * scales[:, None]
+        return dense
+
+    @property
+    def sq_norms(self) -> np.ndarray:
+        if self._sq_norms is None:
+            dense = self.dense()
+            self._sq_norms = np.einsum("ij,ij->i", dense, dense)
+        return self._sq_norms
+
+    def select(self, where: Optional[dict]) -> np.ndarray:
+        if not where:
+            return np.arange(len(self.ids))
+        return np.fromiter(
+            (row for row, metadata in enumerate(self.metadatas) if matches(metadata, where)),
+            dtype=np.int64,
+        )
+
+    def distances(self, embedding: Sequence[float], rows: np.ndarray) -> np.ndarray:
+        """
+        Squared L2 distances (Chroma's default space) from `embedding` to
+        `rows`, with a single matrix-vector product over the stored vectors.
+        """
+        query = np.asarray(embedding, dtype=np.float32)
+        dots = np.asarray(self.vectors[rows], dtype=np.float32) @ query
+        if self.scales is not None:
+            dots *= self.scales[rows]
+        return np.maximum(self.sq_norms[rows] - 2 * dots + query @ query, 0.0)
+
+EMPTY = Snapshot([], [], [], np.zeros((0, 0), dtype=np.float32), None)
+
+class FlatCollection:
+    """
+    Exact (brute-force) vector collection for one video's chunks.
+
+    The directory holds `vectors.<generation>.npy`, a contiguous
+    (optionally quantized) matrix opened memory-mapped, and `index.json`
+    with the chunk ids, texts, metadata and int8 scales. Every write
+    publishes a new generation and swaps the manifest atomically; other
+    processes pick it up on their next read.
+
+    Mirrors the parts of a Chroma collection the app uses (`get`,
+    `upsert`, `update`, `delete`, `count`), so the vector store helpers work
+    on either backend.
+    """
+
+    def __init__(self, path: Path, dtype: str = "float32"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported flat index dtype: {dtype}")
+        self.path = Path(path)
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        self._snapshot = EMPTY
+        self._refresh()
+
+    def _stamp(self):
+        try:
+            stat = (self.path / MANIFEST).stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _refresh(self) -> Snapshot:
+        # A manifest read just before two quick writes can name a vectors
+        # file that is already gone; the next manifest names a live one.
+        for attempt in range(REFRESH_ATTEMPTS):
+            try:
+                return self._refresh_once()
+            except FileNotFoundError:
+                if attempt == REFRESH_ATTEMPTS - 1:
+                    raise
+
+    def _refresh_once(self) -> Snapshot:
+        stamp = self._stamp()
+        snapshot = self._snapshot
+        if stamp == snapshot.stamp:
+            return snapshot
+        if stamp is None:
+            self._snapshot = EMPTY
+            return EMPTY
+
+        manifest = json.loads((self.path / MANIFEST).read_text())
+        vectors = np.load(self.path / manifest["vectors"], mmap_mode="r")
+        scales = manifest.get("scales")
+        snapshot = Snapshot(
+            ids=manifest["ids"],
+            documents=manifest["documents"],
+            metadatas=manifest["metadatas"],
+            vectors=vectors,
+            scales=np.asarray(scales, dtype=np.float32) if scales is not None else None,
+            stamp=stamp,
+        )
+        self._snapshot = snapshot
+        return snapshot
+
+    def _write(self, ids: List[str], documents: List[str], metadatas: List[dict], matrix: np.ndarray) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        generation = uuid.uuid4().hex[:12]
+        vectors_name = f"vectors.{generation}.npy"
+
+        stored, scales = quantize(matrix, self.dtype)
+        np.save(self.path / vectors_name, stored)
+
+        try:
+            previous = json.loads((self.path / MANIFEST).read_text())["vectors"]
+        except FileNotFoundError:
+            previous = None
+
+        tmp = self.path / f"{MANIFEST}.{generation}.tmp"
+        tmp.write_text(json.dumps({
+            "vectors": vectors_name,
+            "dtype": self.dtype,
+            "ids": ids,
+            "documents": documents,
+            "metadatas": metadatas,
+            "scales": scales.tolist() if scales is not None else None,
+        }, separators=(",", ":")))
+        os.replace(tmp, self.path / MANIFEST)
+
+        # The previous generation is kept until the next write, for readers
+        # that loaded its manifest but not yet its vectors; open maps of
+        # older generations stay valid after unlinking.
+        for old in self.path.glob("vectors.*.npy"):
+            if old.name not in (vectors_name, previous):
+                old.unlink(missing_ok=True)
+        self._refresh()
+
+    def count(self) -> int:
+        return len(self._refresh().ids)
+
+    def get(
+        self,
+        ids: Optional[Sequence[str]] = None,
+        where: Optional[dict] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        include: Optional[Iterable[str]] = None,
+        **kwargs,
+    ) -> dict:
+        snapshot = self._refresh()
+        include = set(include) if include is not None else {"documents", "metadatas"}
+
+        if ids is not None:
+            rows = [snapshot.rows[chunk_id] for chunk_id in ids if chunk_id in snapshot.rows]
+            rows = [row for row in rows if matches(snapshot.metadatas[row], where)]
+        else:
+            rows = snapshot.select(where).tolist()
+        rows = rows[offset or 0:]
+        if limit is not None:
+            rows = rows[:limit]
+
+        return {
+            "ids": [snapshot.ids[row] for row in rows],
+            "documents": [snapshot.documents[row] for row in rows] if "documents" in include else None,
+            "metadatas": [snapshot.metadatas[row] for row in rows] if "metadatas" in include else None,
+            "embeddings": snapshot.dense(rows) if "embeddings" in include else None,
+        }
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[dict]] = None,
+    ) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            snapshot = self._refresh()
+            # A writable copy: unquantized vectors are the read-only map itself.
+            matrix = np.array(snapshot.dense())
+            if len(matrix) and vectors.shape[1] != matrix.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match collection dimensionality {matrix.shape[1]}"
+                )
+
+            all_ids, all_documents, all_metadatas = list(snapshot.ids), list(snapshot.documents), list(snapshot.metadatas)
+            rows = dict(snapshot.rows)
+            added = []
+            for i, chunk_id in enumerate(ids):
+                document = documents[i] if documents is not None else ""
+                metadata = dict(metadatas[i] or {}) if metadatas is not None else {}
+                row = rows.get(chunk_id)
+                if row is None:
+                    rows[chunk_id] = len(all_ids)
+                    all_ids.append(chunk_id)
+                    all_documents.append(document)
+                    all_metadatas.append(metadata)
+                    added.append(vectors[i])
+                else:
+                    all_documents[row] = document
+                    all_metadatas[row] = metadata
+                    matrix[row] = vectors[i]
+
+            if added:
+                matrix = np.vstack([matrix, np.stack(added)]) if len(matrix) else np.stack(added)
+            self._write(all_ids, all_documents, all_metadatas, matrix)
+
+    def update(
+        self,
+        ids: Sequence[str],
+        embeddings: Optional[Sequence[Sequence[float]]] = None,
+        documents: Optional[Sequence[str]] = None,
+        metadatas: Optional[Sequence[dict]] = None,
+    ) -> None:
+        # Like Chroma: metadata keys are merged, unknown ids are ignored.
+        with self._lock:
+            snapshot = self._refresh()
+            matrix = np.array(snapshot.dense())
+            all_documents, all_metadatas = list(snapshot.documents), list(snapshot.metadatas)
+            for i, chunk_id in enumerate(ids):
+                row = snapshot.rows.get(chunk_id)
+                if row is None:
+                    continue
+                if metadatas is not None:
+                    all_metadatas[row] = {**all_metadatas[row], **(metadatas[i] or {})}
+                if documents is not None:
+                    all_documents[row] = documents[i]
+                if embeddings is not None:
+                    matrix[row] = np.asarray(embeddings[i], dtype=np.float32)
+            self._write(list(snapshot.ids), all_documents, all_metadatas, matrix)
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[dict] = None) -> None:
+        with self._lock:
+            snapshot = self._refresh()
+            doomed = set(self.get(ids=ids, where=where, include=[])["ids"])
+            if not doomed:
+                return
+            keep = [row for row, chunk_id in enumerate(snapshot.ids) if chunk_id not in doomed]
+            self._write(
+                [snapshot.ids[row] for row in keep],
+                [snapshot.documents[row] for row in keep],
+                [snapshot.metadatas[row] for row in keep],
+                snapshot.dense(keep) if keep else np.zeros((0, snapshot.vectors.shape[1]), dtype=np.float32),
+            )
+
+    def nearest(
+        self,
+        embedding: Sequence[float],
+        k: int,
+        where: Optional[dict] = None,
+    ) -> Tuple[Snapshot, np.ndarray, np.ndarray]:
+        """
+        Returns (snapshot, rows, squared L2 distances) of the `k` closest
+        chunks matching `where`, closest first.
+        """
+        snapshot = self._refresh()
+        rows = snapshot.select(where)
+        if not len(rows) or k <= 0:
+            return snapshot, rows[:0], np.zeros(0, dtype=np.float32)
+
+        distances = snapshot.distances(embedding, rows)
+        if k < len(rows):
+            top = np.argpartition(distances, k - 1)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(distances[top], kind="stable")]
+        return snapshot, rows[top], distances[top]
+
+class FlatVectorStore(VectorStore):
+    """
+    LangChain vector store over a `FlatCollection`, exposing the Chroma
+    methods the app calls. Distances are squared L2, as with Chroma.
+    """
+
+    def __init__(self, collection: FlatCollection, embedding_function: Embeddings):
+        self._collection = collection
+        self._embedding_function = embedding_function
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    @staticmethod
+    def _document(snapshot: Snapshot, row: int) -> Document:
+        return Document(
+            id=snapshot.ids[row],
+            page_content=snapshot.documents[row],
+            metadata=dict(snapshot.metadatas[row]),
+        )
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        return self._euclidean_relevance_score_fn
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **kwargs: Any,
+    ) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        self._collection.upsert(
+            ids=ids,
+            embeddings=self._embedding_function.embed_documents(texts),
+            documents=texts,
+            metadatas=metadatas,
+        )
+        return ids
+
+    def get(self, ids=None, where=None, limit=None, offset=None, include=None, **kwargs) -> dict:
+        return self._collection.get(ids=ids, where=where, limit=limit, offset=offset, include=include)
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> None:
+        self._collection.delete(ids=ids, where=kwargs.get("where"))
+
+    def similarity_search_by_vector_with_relevance_scores(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        snapshot, rows, distances = self._collection.nearest(embedding, k, where=filter)
+        return [(self._document(snapshot, row), float(d)) for row, d in zip(rows, distances)]
+
+    def similarity_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [
+            doc for doc, _ in self.similarity_search_by_vector_with_relevance_scores(embedding, k, filter)
+        ]
+
+    def similarity_search_with_score(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_relevance_scores(
+            self._embedding_function.embed_query(query), k, filter
+        )
+
+    def similarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        snapshot, rows, _ = self._collection.nearest(embedding, fetch_k, where=filter)
+        selected = set(maximal_marginal_relevance(
+            np.asarray(embedding, dtype=np.float32),
+            snapshot.dense(rows),
+            k=k,
+            lambda_mult=lambda_mult,
+        ))
+        # Same ordering as the Chroma store: candidates in distance order.
+        return [self._document(snapshot, row) for i, row in enumerate(rows) if i in selected]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> List[Document]:
+        return self.max_marginal_relevance_search_by_vector(
+            self._embedding_function.embed_query(query),
+            k=k,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            filter=filter,
+        )
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: List[str],
+        embedding: Embeddings,
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        persist_directory: Optional[str] = None,
+        dtype: str = "float32",
+        **kwargs: Any,
+    ) -> "FlatVectorStore":
+        if persist_directory is None:
+            raise ValueError("persist_directory is required for the flat vector store")
+        store = cls(FlatCollection(Path(persist_directory), dtype=dtype), embedding)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        return store
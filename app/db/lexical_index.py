@@ -0,0 +1,178 @@
+from array import array
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+import os
+import re
+import threading
+
+import numpy as np
+
+from app.core.config import get_settings
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+_CACHE_SIZE = 256
+_cache: "OrderedDict[str, tuple[float, LexicalIndex]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+def _pack_strings(values: Sequence[str]) -> np.ndarray:
+    return np.frombuffer("\n".join(values).encode("utf-8"), dtype=np.uint8)
+
+def _unpack_strings(data: np.ndarray) -> List[str]:
+    text = data.tobytes().decode("utf-8")
+    return text.split("\n") if text else []
+
+class LexicalIndex:
+    """
+    Compact BM25 inverted index over one video's chunks.
+
+    Postings are stored term-major in flat arrays: the postings of term id
+    `t` are `docs[offsets[t]:offsets[t + 1]]` with matching `tfs`.
+    """
+
+    def __init__(
+        self,
+        vocab: List[str],
+        chunk_ids: List[str],
+        doc_lengths: np.ndarray,
+        offsets: np.ndarray,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+    ):
+        self.vocab = vocab
+        self.term_ids = {term: i for i, term in enumerate(vocab)}
+        self.chunk_ids = chunk_ids
+        self.doc_lengths = doc_lengths
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+
+    def search(self, query: str, k: int, k1: float = 1.5, b: float = 0.75) -> List[Tuple[str, float]]:
+        total = len(self.chunk_ids)
+        if not total:
+            return []
+
+        scores = np.zeros(total, dtype=np.float32)
+        norm = k1 * (1 - b + b * self.doc_lengths / max(self.avg_length, 1.0))
+
+        for term in set(tokenize(query)):
+            term_id = self.term_ids.get(term)
+            if term_id is None:
+                continue
+
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs = self.docs[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            idf = np.log1p((total - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tf * (k1 + 1) / (tf + norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if not len(matched):
+            return []
+
+        top = matched[np.argsort(-scores[matched], kind="stable")[:k]]
+        return [(self.chunk_ids[i], float(scores[i])) for i in top]
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as handle:
+            np.savez(
+                handle,
+                vocab=_pack_strings(self.vocab),
+                chunk_ids=_pack_strings(self.chunk_ids),
+                doc_lengths=self.doc_lengths,
+                offsets=self.offsets,
+                docs=self.docs,
+                tfs=self.tfs,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> "LexicalIndex":
+        with np.load(path) as data:
+            return cls(
+                vocab=_unpack_strings(data["vocab"]),
+                chunk_ids=_unpack_strings(data["chunk_ids"]),
+                doc_lengths=data["doc_lengths"],
+                offsets=data["offsets"],
+                docs=data["docs"],
+                tfs=data["tfs"],
+            )
+
+class LexicalIndexBuilder:
+    """
+    Accumulates postings one chunk at a time, so the chunk texts themselves
+    never need to be held.
+    """
+
+    def __init__(self):
+        self.term_ids: dict = {}
+        self.chunk_ids: List[str] = []
+        self.posting_terms, self.posting_docs, self.posting_tfs = array("I"), array("I"), array("H")
+        self.doc_lengths = array("I")
+
+    def add(self, chunk_id: str, text: str) -> None:
+        doc = len(self.chunk_ids)
+        self.chunk_ids.append(chunk_id)
+
+        counts = Counter(tokenize(text))
+        self.doc_lengths.append(sum(counts.values()))
+        for term, tf in counts.items():
+            self.posting_terms.append(self.term_ids.setdefault(term, len(self.term_ids)))
+            self.posting_docs.append(doc)
+            self.posting_tfs.append(min(tf, 0xFFFF))
+
+    def build(self) -> LexicalIndex:
+        terms = np.frombuffer(self.posting_terms, dtype=np.uint32)
+        order = np.argsort(terms, kind="stable")
+        offsets = np.zeros(len(self.term_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self.term_ids)), out=offsets[1:])
+
+        return LexicalIndex(
+            vocab=list(self.term_ids),
+            chunk_ids=list(self.chunk_ids),
+            doc_lengths=np.frombuffer(self.doc_lengths, dtype=np.uint32).copy(),
+            offsets=offsets,
+            docs=np.frombuffer(self.posting_docs, dtype=np.uint32)[order],
+            tfs=np.frombuffer(self.posting_tfs, dtype=np.uint16)[order],
+        )
+
+def lexical_index_path(video_id: str) -> Path:
+    return get_settings().CHROMA_DIR / "lexical" / f"video_{video_id}.npz"
+
+def load_lexical_index(video_id: str) -> Optional[LexicalIndex]:
+    """
+    Returns the video's index (cached while its file is unchanged), or None.
+    """
+    path = lexical_index_path(video_id)
+    try:
+        mtime = path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+    with _cache_lock:
+        entry = _cache.get(video_id)
+        if entry is not None and entry[0] == mtime:
+            _cache.move_to_end(video_id)
+            return entry[1]
+
+    index = LexicalIndex.load(path)
+
+    with _cache_lock:
+        _cache[video_id] = (mtime, index)
+        _cache.move_to_end(video_id)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return index
+
+def delete_lexical_index(video_id: str) -> None:
+    with _cache_lock:
+        _cache.pop(video_id, None)
+    lexical_index_path(video_id).unlink(missing_ok=True)
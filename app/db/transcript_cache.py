@@ -0,0 +1,164 @@
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+from app.core.config import get_settings
+
+_transcript_cache = None
+
+class TranscriptSegment(NamedTuple):
+    text: str
+    start: float
+    duration: float
+
+class CachedTranscript(NamedTuple):
+    segments: List[TranscriptSegment]
+    source: str
+    fetched_at: float
+
+class TranscriptCache:
+    """
+    On-disk cache of fetched transcript segments, one gzip'd JSON file per
+    (video, language), with TTL expiry and size-capped LRU eviction (file
+    mtime is bumped on every read).
+    """
+
+    def __init__(self, root: Path, ttl_seconds: int, max_bytes: int):
+        self.root = Path(root)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    def path(self, video_id: str, language: str) -> Path:
+        digest = hashlib.sha1(f"{video_id}:{language}".encode("utf-8")).hexdigest()[:16]
+        return self.root / f"{digest}.json.gz"
+
+    def get(self, video_id: str, language: str) -> Optional[CachedTranscript]:
+        path = self.path(video_id, language)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as handle:
+                payload = json.load(handle)
+        except (OSError, EOFError, ValueError):
+            # Missing, or truncated/corrupt (e.g. a crash mid-write).
+            self._count(hit=False)
+            return None
+
+        if self.ttl_seconds > 0 and time.time() - payload["fetched_at"] > self.ttl_seconds:
+            self.delete(video_id, language)
+            self._count(hit=False)
+            return None
+
+        # Reads refresh mtime, which orders LRU eviction.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self._count(hit=True)
+        return CachedTranscript(
+            segments=[TranscriptSegment(*segment) for segment in payload["segments"]],
+            source=payload["source"],
+            fetched_at=payload["fetched_at"],
+        )
+
+    def put(self, video_id: str, language: str, segments, source: str) -> None:
+        payload = {
+            "video_id": video_id,
+            "language": language,
+            "source": source,
+            "fetched_at": time.time(),
+            "segments": [
+                [segment.text, float(segment.start), float(segment.duration)]
+                for segment in segments
+            ],
+        }
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.path(video_id, language)
+        # Unique per writer: workers may cache the same transcript concurrently.
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        try:
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as handle:
+                json.dump(payload, handle, separators=(",", ":"))
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            previous = path.stat().st_size if path.exists() else 0
+            os.replace(tmp, path)
+            if self._total_bytes is not None:
+                self._total_bytes += path.stat().st_size - previous
+            self._evict()
+
+    def delete(self, video_id: str, language: str) -> None:
+        path = self.path(video_id, language)
+        with self._lock:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                return
+            if self._total_bytes is not None:
+                self._total_bytes -= size
+
+    def _evict(self) -> None:
+        if self.max_bytes <= 0:
+            return
+
+        if self._total_bytes is None:
+            self._total_bytes = sum(p.stat().st_size for p in self.root.glob("*.json.gz"))
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        files = []
+        for path in self.root.glob("*.json.gz"):
+            stat = path.stat()
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        for _, size, path in sorted(files):
+            if self._total_bytes <= self.max_bytes * 0.9:
+                break
+            path.unlink(missing_ok=True)
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+def get_transcript_cache() -> TranscriptCache:
+    global _transcript_cache
+    if _transcript_cache is None:
+        settings = get_settings()
+        _transcript_cache = TranscriptCache(
+            root=settings.DATA_DIR / "transcripts",
+            ttl_seconds=settings.TRANSCRIPT_CACHE_TTL_SECONDS,
+            max_bytes=settings.TRANSCRIPT_CACHE_MAX_BYTES,
+        )
+    return _transcript_cache
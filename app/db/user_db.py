@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import get_settings
 from pathlib import Path
@@ -18,4 +18,24 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+def sync_schema(engine, metadata):
+    """
+    Adds columns that were introduced after a table was first created.
+
+    `create_all` never alters existing tables, so new nullable columns are
+    appended with ALTER TABLE.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
@@ -1,31 +1,544 @@
-from langchain_chroma import Chroma
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Optional
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+
 from app.core.config import get_settings
+from app.db.embedding_cache import CachedEmbeddings, EmbeddingCache
 from dotenv import load_dotenv
 
 load_dotenv()
 
+if TYPE_CHECKING:
+    # Chroma itself is imported when a store is first opened (slow import).
+    from langchain_chroma import Chroma
+    from app.db.flat_index import FlatVectorStore
+
+# Names the live generation subdirectory of a per-video store.
+GENERATION_FILE = "CURRENT"
+# Present at the top of per-video stores written before generations (Chroma, flat).
+LEGACY_STORE_FILES = ("chroma.sqlite3", "index.json")
+
 _embeddings = None
+_embedding_cache = None
+_pool = None
 
 def get_embeddings():
     global _embeddings
     if _embeddings is None:
         from langchain_cohere import CohereEmbeddings
-        _embeddings = CohereEmbeddings(model="embed-v4.0")
+        settings = get_settings()
+        _embeddings = CohereEmbeddings(model=settings.EMBEDDING_MODEL)
+
+        if settings.EMBEDDING_CACHE_ENABLED:
+            _embeddings = CachedEmbeddings(
+                embeddings=_embeddings,
+                cache=get_embedding_cache(),
+                model_name=settings.EMBEDDING_MODEL,
+            )
     return _embeddings
 
-def get_vectorstore(
-    video_id: str,
-) -> Chroma:
+def get_embedding_cache() -> EmbeddingCache:
+    global _embedding_cache
+    if _embedding_cache is None:
+        settings = get_settings()
+        _embedding_cache = EmbeddingCache(
+            path=settings.DATA_DIR / "embedding_cache.db",
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+        )
+    return _embedding_cache
+
+def flush_embedding_cache() -> None:
+    # Writes out buffered hit times; a no-op if the cache was never opened.
+    if _embedding_cache is not None:
+        _embedding_cache.flush()
+
+class _PooledStore:
     """
-    Returns a video scoped vector store.
+    A pooled handle and the number of checkouts currently holding it.
+    """
+
+    __slots__ = ("key", "store", "version", "release", "last_used", "borrowers", "retired", "stale")
+
+    def __init__(self, key: str, store, version, release: Optional[Callable[[], None]]):
+        self.key = key
+        self.store = store
+        self.version = version
+        self.release = release
+        self.last_used = time.monotonic()
+        self.borrowers = 0
+        self.retired = False
+        self.stale = False
+
+class VectorStorePool:
+    """
+    Process-wide LRU pool of open vector store handles with idle-TTL eviction.
+
+    Handles are borrowed with `checkout`. An evicted or expired handle is
+    closed (its `release` callback runs) once its last borrower returns it,
+    and is reused if checked out again before that. Handles are keyed by
+    `key` and `version`: a checkout with a new version retires the old handle.
     """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._stores: "OrderedDict[str, _PooledStore]" = OrderedDict()
+        # Retired handles still held by a borrower.
+        self._draining: Dict[str, List[_PooledStore]] = {}
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @contextmanager
+    def checkout(
+        self,
+        key: str,
+        factory: Callable[[], "Chroma"],
+        version=None,
+        release: Optional[Callable[[], None]] = None,
+    ) -> Iterator["Chroma"]:
+        entry = self._acquire(key, factory, version, release)
+        try:
+            yield entry.store
+        finally:
+            self._return(entry)
+
+    def _acquire(self, key, factory, version, release) -> _PooledStore:
+        closing: List[_PooledStore] = []
+        with self._lock:
+            self._expire(time.monotonic(), closing)
+            entry = self._find(key, version, closing)
+            if entry is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+                generation = self._generations.get(key, 0)
+        self._close(closing)
+        if entry is not None:
+            return entry
+
+        # Opening a store touches disk, so it happens outside the lock.
+        store = factory()
+
+        with self._lock:
+            entry = self._find(key, version, closing)
+            if entry is None:
+                entry = _PooledStore(key, store, version, release)
+                entry.borrowers = 1
+                if self._generations.get(key, 0) != generation:
+                    # An invalidation raced with the open: lend the handle out, don't pool it.
+                    entry.retired = entry.stale = True
+                    self._draining.setdefault(key, []).append(entry)
+                else:
+                    self._stores[key] = entry
+                    self._shrink(closing)
+        self._close(closing)
+        return entry
+
+    def _find(self, key: str, version, closing: List[_PooledStore]) -> Optional[_PooledStore]:
+        """
+        The live (or revivable draining) handle for `key` at `version`,
+        checked out once more. Must hold the lock.
+        """
+        entry = self._stores.get(key)
+        if entry is not None and entry.version != version:
+            self._retire(self._stores.pop(key), closing)
+            entry = None
+
+        if entry is None:
+            for draining in self._draining.get(key, []):
+                if draining.version == version and not draining.stale:
+                    self._draining[key].remove(draining)
+                    draining.retired = False
+                    self._stores[key] = entry = draining
+                    break
+
+        if entry is not None:
+            entry.last_used = time.monotonic()
+            entry.borrowers += 1
+            self._stores.move_to_end(key)
+            self._shrink(closing)
+        return entry
+
+    def _shrink(self, closing: List[_PooledStore]) -> None:
+        while len(self._stores) > self.max_size:
+            _, lru = self._stores.popitem(last=False)
+            self._retire(lru, closing)
+            self.evictions += 1
+
+    def _retire(self, entry: _PooledStore, closing: List[_PooledStore]) -> None:
+        entry.retired = True
+        if entry.borrowers:
+            self._draining.setdefault(entry.key, []).append(entry)
+        else:
+            closing.append(entry)
+
+    def _return(self, entry: _PooledStore) -> None:
+        closing: List[_PooledStore] = []
+        with self._lock:
+            entry.borrowers -= 1
+            if entry.retired and not entry.borrowers:
+                self._draining[entry.key].remove(entry)
+                if not self._draining[entry.key]:
+                    del self._draining[entry.key]
+                closing.append(entry)
+        self._close(closing)
+
+    def _close(self, closing: List[_PooledStore]) -> None:
+        for entry in closing:
+            if entry.release is None:
+                continue
+            with self._lock:
+                # Handles of the same key and version share one underlying
+                # client; the last one open closes it.
+                shared = [self._stores.get(entry.key), *self._draining.get(entry.key, [])]
+                if any(other is not None and other.version == entry.version for other in shared):
+                    continue
+            entry.release()
+
+    def invalidate(self, key: str) -> None:
+        """
+        Drops the pooled handle; it is closed once its borrowers return it.
+        """
+        closing: List[_PooledStore] = []
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            for draining in self._draining.get(key, []):
+                draining.stale = True
+            entry = self._stores.pop(key, None)
+            if entry is not None:
+                entry.stale = True
+                self._retire(entry, closing)
+        self._close(closing)
+
+    def clear(self) -> None:
+        closing: List[_PooledStore] = []
+        with self._lock:
+            for key, entry in self._stores.items():
+                self._generations[key] = self._generations.get(key, 0) + 1
+                entry.stale = True
+                self._retire(entry, closing)
+            self._stores.clear()
+        self._close(closing)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._stores),
+                "draining": sum(len(entries) for entries in self._draining.values()),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _expire(self, now: float, closing: List[_PooledStore]) -> None:
+        if self.ttl_seconds <= 0:
+            return
+
+        expired = [
+            key for key, entry in self._stores.items()
+            if not entry.borrowers and now - entry.last_used > self.ttl_seconds
+        ]
+        for key in expired:
+            self._retire(self._stores.pop(key), closing)
+            self.evictions += 1
+
+def get_vectorstore_pool() -> VectorStorePool:
+    global _pool
+    if _pool is None:
+        settings = get_settings()
+        _pool = VectorStorePool(
+            max_size=settings.VECTORSTORE_POOL_SIZE,
+            ttl_seconds=settings.VECTORSTORE_POOL_TTL_SECONDS,
+        )
+    return _pool
+
+def get_shard(video_id: str, shards: int) -> int:
+    digest = hashlib.sha1(video_id.encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) % max(1, shards)
+
+def _open_vectorstore(path: Path) -> "Chroma":
+    from langchain_chroma import Chroma
+
+    return Chroma(
+        persist_directory=str(path),
+        embedding_function=get_embeddings(),
+    )
+
+def _open_shared_vectorstore(shard: int) -> "Chroma":
+    from langchain_chroma import Chroma
+
     settings = get_settings()
-    settings.CHROMA_DIR.mkdir(parents=True, exist_ok=True)
-    
-    path = settings.CHROMA_DIR / f"video_{video_id}"
-    embedding_model = get_embeddings()
+    path = settings.CHROMA_DIR / "shared"
+    path.mkdir(parents=True, exist_ok=True)
 
     return Chroma(
+        collection_name=f"videos_{shard:03d}",
         persist_directory=str(path),
-        embedding_function=embedding_model,
+        embedding_function=get_embeddings(),
+    )
+
+def _open_flat_vectorstore(path: Path) -> "FlatVectorStore":
+    from app.db.flat_index import FlatCollection, FlatVectorStore
+
+    return FlatVectorStore(
+        FlatCollection(path, dtype=get_settings().FLAT_INDEX_DTYPE),
+        embedding_function=get_embeddings(),
+    )
+
+def read_generation(path: Path) -> Optional[str]:
+    """
+    The generation a per-video store directory's `CURRENT` file names; ""
+    for a store written before generations existed, None when there is no
+    store.
+    """
+    try:
+        return (path / GENERATION_FILE).read_text()
+    except FileNotFoundError:
+        pass
+    if any((path / name).exists() for name in LEGACY_STORE_FILES):
+        return ""
+    return None
+
+def generation_path(path: Path, generation: str) -> Path:
+    return path / generation if generation else path
+
+def new_generation() -> str:
+    return f"gen-{uuid.uuid4().hex[:12]}"
+
+def _ensure_generation(path: Path) -> str:
+    generation = read_generation(path)
+    if generation is not None:
+        return generation
+
+    path.mkdir(parents=True, exist_ok=True)
+    generation = new_generation()
+    tmp = path / f"{GENERATION_FILE}.{generation}.tmp"
+    tmp.write_text(generation)
+    try:
+        # Atomic and exclusive: concurrent openers agree on one generation.
+        os.link(tmp, path / GENERATION_FILE)
+    except FileExistsError:
+        generation = read_generation(path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    return generation
+
+def publish_generation(path: Path, generation: str) -> None:
+    """
+    Points `CURRENT` at `generation`. The previous generation is kept until
+    the next publish, for readers that read `CURRENT` just before the swap;
+    older ones are removed.
+    """
+    previous = read_generation(path)
+    tmp = path / f"{GENERATION_FILE}.{generation}.tmp"
+    tmp.write_text(generation)
+    os.replace(tmp, path / GENERATION_FILE)
+
+    for entry in path.iterdir():
+        if entry.name in (GENERATION_FILE, generation, previous) or entry.name.endswith(".tmp"):
+            continue
+        # Files of a pre-generation store are the previous generation.
+        if previous == "" and not entry.name.startswith("gen-"):
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            entry.unlink(missing_ok=True)
+
+def _store_key(video_id: str) -> str:
+    settings = get_settings()
+    if settings.VECTORSTORE_BACKEND == "flat":
+        return f"flat_{video_id}"
+    if settings.VECTORSTORE_LAYOUT == "shared":
+        return f"shard_{get_shard(video_id, settings.VECTORSTORE_SHARDS)}"
+    return f"video_{video_id}"
+
+@contextmanager
+def checkout_shared_vectorstore(video_id: str) -> Iterator["Chroma"]:
+    """
+    Borrows the shard of the shared collection that holds this video.
+    """
+    shard = get_shard(video_id, get_settings().VECTORSTORE_SHARDS)
+    with get_vectorstore_pool().checkout(
+        f"shard_{shard}",
+        lambda: _open_shared_vectorstore(shard),
+    ) as store:
+        yield store
+
+@contextmanager
+def checkout_vectorstore(video_id: str) -> Iterator["Chroma"]:
+    """
+    Borrows a video scoped vector store from the pool for the duration of
+    the block; the handle must not be used after it.
+
+    With the shared layout the store holds many videos, so queries must
+    filter on the `video_id` metadata (see `video_filter`). The flat backend
+    is always per video, and per-video stores live in a generation
+    subdirectory named by the directory's `CURRENT` file.
+    """
+    path = video_store_path(video_id)
+    if path is None:
+        with checkout_shared_vectorstore(video_id) as store:
+            yield store
+        return
+
+    # Another process may have replaced the store (eviction, full rebuild):
+    # a new generation retires the pooled handle of the old one.
+    generation = _ensure_generation(path)
+    store_path = generation_path(path, generation)
+    if get_settings().VECTORSTORE_BACKEND == "flat":
+        opener, release = _open_flat_vectorstore, None
+    else:
+        opener, release = _open_vectorstore, lambda: release_chroma_system(store_path)
+
+    with get_vectorstore_pool().checkout(
+        _store_key(video_id),
+        lambda: opener(store_path),
+        version=generation,
+        release=release,
+    ) as store:
+        yield store
+
+@contextmanager
+def build_vectorstore(video_id: str) -> Iterator["Chroma"]:
+    """
+    Yields an empty, unpooled store in a new generation of a per-video
+    store. It replaces the current generation when the block completes;
+    if the block raises, it is removed and the current one is untouched.
+    Callers hold the video's ingest lock.
+    """
+    path = video_store_path(video_id)
+    if path is None:
+        raise ValueError("Shard collections cannot be rebuilt per video")
+
+    generation = new_generation()
+    store_path = path / generation
+    path.mkdir(parents=True, exist_ok=True)
+    if get_settings().VECTORSTORE_BACKEND == "flat":
+        store, release = _open_flat_vectorstore(store_path), None
+    else:
+        store, release = _open_vectorstore(store_path), lambda: release_chroma_system(store_path)
+
+    try:
+        yield store
+    except BaseException:
+        if release is not None:
+            release()
+        shutil.rmtree(store_path, ignore_errors=True)
+        raise
+
+    if release is not None:
+        release()
+    publish_generation(path, generation)
+    get_vectorstore_pool().invalidate(_store_key(video_id))
+
+def video_filter(video_id: str) -> dict:
+    """
+    Metadata filter for a video's published chunks (staged chunks of an
+    in-flight re-ingest are hidden).
+    """
+    return {"$and": [{"video_id": video_id}, {"staged": {"$ne": True}}]}
+
+def list_chunk_ids(store: "Chroma", video_id: str) -> set:
+    return set(store.get(where={"video_id": video_id}, include=[])["ids"])
+
+def add_embedded_chunks(store: "Chroma", ids: list, chunks: list, vectors: list) -> None:
+    """
+    Writes chunks whose embeddings were computed up front.
+    """
+    store._collection.upsert(
+        ids=list(ids),
+        embeddings=vectors,
+        documents=[chunk.page_content for chunk in chunks],
+        metadatas=[chunk.metadata for chunk in chunks],
+    )
+
+def update_chunk_metadata(store: "Chroma", ids: list, metadatas: list) -> None:
+    # Chroma merges the given keys into the stored metadata.
+    if ids:
+        store._collection.update(ids=list(ids), metadatas=list(metadatas))
+
+def publish_chunks(store: "Chroma", ids: list, retired_ids: list, metadatas: Optional[dict] = None) -> None:
+    """
+    Marks `ids` as published and hides `retired_ids`, in a single collection
+    update. `metadatas` maps some of `ids` to metadata merged in by the same
+    update.
+    """
+    if not ids and not retired_ids:
+        return
+
+    metadatas = metadatas or {}
+    update_chunk_metadata(
+        store,
+        ids=list(ids) + list(retired_ids),
+        metadatas=[{**metadatas.get(chunk_id, {}), "staged": False} for chunk_id in ids]
+        + [{"staged": True}] * len(retired_ids),
     )
+
+def invalidate_vectorstore(video_id: str) -> None:
+    # Shards are shared by many videos and are rewritten in place through the
+    # pooled handle, so only per-video handles need dropping.
+    settings = get_settings()
+    if settings.VECTORSTORE_BACKEND != "flat" and settings.VECTORSTORE_LAYOUT == "shared":
+        return
+    get_vectorstore_pool().invalidate(_store_key(video_id))
+
+def video_store_root() -> Optional[Path]:
+    """
+    Parent of the per-video `video_<id>` directories, or None with the
+    shared layout.
+    """
+    settings = get_settings()
+    if settings.VECTORSTORE_BACKEND == "flat":
+        return settings.CHROMA_DIR / "flat"
+    if settings.VECTORSTORE_LAYOUT == "shared":
+        return None
+    return settings.CHROMA_DIR
+
+def video_store_path(video_id: str) -> Optional[Path]:
+    root = video_store_root()
+    return root / f"video_{video_id}" if root is not None else None
+
+def release_chroma_system(path: Path) -> None:
+    # Chroma keeps one running system per persist directory for the life of
+    # the process; stop it so the directory can be removed and recreated.
+    if "chromadb" not in sys.modules:
+        return
+    from chromadb.api.shared_system_client import SharedSystemClient
+
+    identifier = str(path)
+    with SharedSystemClient._refcount_lock:
+        SharedSystemClient._identifier_to_refcount.pop(identifier, None)
+    system = SharedSystemClient._identifier_to_system.pop(identifier, None)
+    if system is not None:
+        system.stop()
+
+def delete_vectorstore(video_id: str) -> None:
+    """
+    Removes a video's vectors. Per-video stores are deleted from disk; with
+    the shared layout the video's chunks are deleted from its shard.
+    """
+    path = video_store_path(video_id)
+    if path is None:
+        with checkout_shared_vectorstore(video_id) as store:
+            store.delete(where={"video_id": video_id})
+        return
+
+    # Closes this process's handle; other processes notice the missing
+    # generation on their next checkout.
+    get_vectorstore_pool().invalidate(_store_key(video_id))
+    shutil.rmtree(path, ignore_errors=True)
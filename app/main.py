@@ -1,13 +1,44 @@
-from fastapi import FastAPI
-from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from contextlib import asynccontextmanager, suppress
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from app.db.user_db import engine
+from app.core.config import get_settings
+from app.db.user_db import engine, sync_schema
 from app.models.user_db import Base
+from app.services.metrics import register_cache_collector
+from app.services.warmup import is_warm, warm_up
+import asyncio
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
+    sync_schema(engine, Base.metadata)
+    register_cache_collector()
+
+    from app.services.ingest_jobs import recover_orphaned_ingest_jobs
+    await run_in_threadpool(recover_orphaned_ingest_jobs)
+
+    # Heavy clients load lazily; optionally start loading them now, without
+    # holding up startup.
+    if get_settings().PREWARM_ON_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+
+    from app.services.store_eviction import get_access_tracker, run_store_maintenance
+    maintenance = asyncio.create_task(run_store_maintenance())
+
     yield
+    maintenance.cancel()
+    with suppress(asyncio.CancelledError):
+        await maintenance
+    await run_in_threadpool(get_access_tracker().flush)
+
+    from app.db.vectorstore import flush_embedding_cache
+    await run_in_threadpool(flush_embedding_cache)
+
+    from app.auth.security import shutdown_hasher_pool
+    from app.services.ingest_jobs import shutdown_ingest_executor
+    shutdown_ingest_executor()
+    shutdown_hasher_pool()
 
 app = FastAPI(title='RAG Youtube bot', lifespan=lifespan, docs_url=None, redoc_url=None)
 
@@ -23,8 +54,19 @@ app.add_middleware(
 )
 
 @app.get("/health")
-def health():
-    return {"status": "ok"}
+async def health(warm: bool = False):
+    """
+    Liveness check. With `?warm=true` it first loads the lazily initialized
+    clients, for use as a readiness probe.
+    """
+    if warm and not is_warm():
+        await run_in_threadpool(warm_up)
+    return {"status": "ok", "warm": is_warm()}
+
+@app.get("/metrics")
+def metrics():
+    from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 def register_routes(app: FastAPI):
     from app.routes import ingest, rag, auth
@@ -0,0 +1,47 @@
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Integer,
+    String,
+    DateTime,
+    ForeignKey,
+    func,
+)
+from sqlalchemy.orm import relationship
+from app.db.user_db import Base
+
+class IngestJob(Base):
+    __tablename__ = "ingest_jobs"
+
+    id = Column(String(32), primary_key=True)
+    username = Column(String(20), nullable=False, index=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+    items = relationship(
+        "IngestJobItem",
+        back_populates="job",
+        order_by="IngestJobItem.id",
+        cascade="all, delete-orphan",
+    )
+
+class IngestJobItem(Base):
+    __tablename__ = "ingest_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(32), ForeignKey("ingest_jobs.id"), nullable=False, index=True)
+    video_id = Column(String, nullable=False)
+    # queued | running | succeeded | failed
+    status = Column(String, nullable=False, default="queued")
+    chunks_added = Column(Integer, nullable=True)
+    error = Column(String, nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    force = Column(Boolean, nullable=True)
+    # Process whose in-memory queue holds the item (see services.ingest_jobs)
+    worker_id = Column(String(32), nullable=True)
+
+    job = relationship("IngestJob", back_populates="items")
@@ -20,6 +20,10 @@ class YouTubeIngestion(Base):
         server_default=func.now(),
         nullable=False,
     )
+    # Last time the stored transcript hash was confirmed against YouTube
+    verified_at = Column(DateTime(timezone=True), nullable=True)
+    # Last time the video was chatted with (flushed in batches; drives eviction)
+    last_accessed_at = Column(DateTime(timezone=True), nullable=True)
 
     __table_args__ = (
         UniqueConstraint(
@@ -1,35 +1,39 @@
 from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.core.schema import TokenResponse, LoginRequest, SignUpRequest
 
 from app.db.session import get_db
-from app.auth.users import authenticate_user, get_user_by_username, create_user, get_user_by_email
-from app.auth.security import create_access_token
+from app.auth.users import authenticate_user, create_user, get_users_by_username_or_email
+from app.auth.security import create_access_token, hash_password_async
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/signup", status_code=201)
-def signup(req: SignUpRequest, db: Session = Depends(get_db)):
-    if get_user_by_username(db, req.username):
+async def signup(req: SignUpRequest, db: Session = Depends(get_db)):
+    existing = await run_in_threadpool(get_users_by_username_or_email, db, req.username, req.email)
+
+    if any(user.username == req.username for user in existing):
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Username already exists"
         )
     
-    if get_user_by_email(db, req.email):
+    if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already registered",
         )
     
-    create_user(db, req.username, req.email, req.password)
+    password_hash = await hash_password_async(req.password)
+    await run_in_threadpool(create_user, db, req.username, req.email, password_hash)
 
     return {"message": "User Created Successfully"}
 
 @router.post("/login", response_model=TokenResponse)
-def login(req: LoginRequest, db: Session = Depends(get_db)):
-    user = authenticate_user(db, req.username, req.password)
+async def login(req: LoginRequest, db: Session = Depends(get_db)):
+    user = await authenticate_user(db, req.username, req.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
 from fastapi.concurrency import run_in_threadpool
 
 from app.services.ingest import ingest_youtube_threaded
-from app.core.schema import YoutubeIngestRequest
+from app.services.ingest_jobs import WORKER_ID, submit_ingest_job, summarize_ingest_job
+from app.auth.ingest_jobs import create_ingest_job, get_ingest_job
+from app.core.schema import YoutubeIngestRequest, YoutubeBatchIngestRequest, IngestJobResponse
 from app.auth.dependencies import get_current_user
 from app.db.session import get_db
 
@@ -12,8 +13,10 @@ router = APIRouter(prefix='/ingest', tags=['Ingest'])
 
 @router.post("/youtube")
 async def ingest_youtube_route(req: YoutubeIngestRequest, user=Depends(get_current_user), db: Session = Depends(get_db)):
+    from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
+
     try:
-        total_chunks = await run_in_threadpool(ingest_youtube_threaded, req.video_id)
+        total_chunks = await run_in_threadpool(ingest_youtube_threaded, req.video_id, req.force)
         return {'status': 'success', 'chunks_added': total_chunks}
     
     except TranscriptsDisabled:
@@ -39,3 +42,19 @@ async def ingest_youtube_route(req: YoutubeIngestRequest, user=Depends(get_curre
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to ingest video {e}",
         )
+
+@router.post("/youtube/batch", response_model=IngestJobResponse, status_code=status.HTTP_202_ACCEPTED)
+def ingest_youtube_batch_route(req: YoutubeBatchIngestRequest, user=Depends(get_current_user), db: Session = Depends(get_db)):
+    job = create_ingest_job(db, username=user, video_ids=req.video_ids, force=req.force, worker_id=WORKER_ID)
+    submit_ingest_job([(item.id, item.video_id) for item in job.items], force=req.force)
+    return summarize_ingest_job(job)
+
+@router.get("/jobs/{job_id}", response_model=IngestJobResponse)
+def ingest_job_status_route(job_id: str, user=Depends(get_current_user), db: Session = Depends(get_db)):
+    job = get_ingest_job(db, job_id=job_id, username=user)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ingest job not found",
+        )
+    return summarize_ingest_job(job)
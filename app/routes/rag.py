@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from app.core.schema import ChatRequest, ChatResponse
 from app.auth.dependencies import get_current_user
-from app.services.rag import chat
+from app.services.rag import chat, chat_videos
 
 router = APIRouter(prefix='/chat', tags=['Chat'])
 
 @router.post('')
-async def chat_route(req: ChatRequest, user=Depends(get_current_user)):
-    return chat(username=user, video_id=req.video_id, question=req.question)
\ No newline at end of file
+async def chat_route(req: ChatRequest, request: Request, user=Depends(get_current_user)):
+    if req.video_id is not None:
+        return await chat(request=request, username=user, video_id=req.video_id, question=req.question)
+    return await chat_videos(
+        request=request,
+        username=user,
+        question=req.question,
+        video_ids=req.video_ids,
+        playlist_id=req.playlist_id,
+    )
\ No newline at end of file
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import re
+import threading
+import time
+
+import numpy as np
+
+from app.core.config import get_settings
+
+_answer_cache = None
+
+def normalize_question(question: str) -> str:
+    question = question.lower()
+    question = re.sub(r"[^\w\s]", "", question)
+    return re.sub(r"\s+", " ", question).strip()
+
+@dataclass
+class _Entry:
+    answer: str
+    embedding: Optional[np.ndarray]
+    created_at: float
+
+class AnswerCache:
+    """
+    Per-video answer cache scoped to a transcript hash.
+
+    Lookups match the normalized question text first and fall back to
+    cosine similarity of question embeddings above `similarity_threshold`.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        # (video_id, transcript_hash, normalized question) -> entry, in LRU order
+        self._entries: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self._by_video: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, video_id: str, transcript_hash: str, question: str) -> Optional[str]:
+        key = (video_id, transcript_hash, normalize_question(question))
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.answer
+
+    def get_similar(
+        self,
+        video_id: str,
+        transcript_hash: str,
+        embedding: List[float],
+    ) -> Optional[str]:
+        query = _unit(embedding)
+
+        with self._lock:
+            keys, vectors = [], []
+            for key in list(self._by_video.get(video_id, ())):
+                if key[1] != transcript_hash:
+                    continue
+                entry = self._live(key)
+                if entry is not None and entry.embedding is not None:
+                    keys.append(key)
+                    vectors.append(entry.embedding)
+
+            if vectors:
+                scores = np.stack(vectors) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.hits += 1
+                    self.semantic_hits += 1
+                    return self._entries[keys[best]].answer
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        video_id: str,
+        transcript_hash: str,
+        question: str,
+        answer: str,
+        embedding: Optional[List[float]] = None,
+    ) -> None:
+        key = (video_id, transcript_hash, normalize_question(question))
+        entry = _Entry(
+            answer=answer,
+            embedding=_unit(embedding) if embedding is not None else None,
+            created_at=time.monotonic(),
+        )
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._by_video.setdefault(video_id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+                self.evictions += 1
+
+    def invalidate(self, video_id: str) -> None:
+        with self._lock:
+            for key in self._by_video.pop(video_id, ()):
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _live(self, key) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        if self.ttl_seconds > 0 and time.monotonic() - entry.created_at > self.ttl_seconds:
+            del self._entries[key]
+            self._forget(key)
+            self.evictions += 1
+            return None
+
+        return entry
+
+    def _forget(self, key) -> None:
+        keys = self._by_video.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_video[key[0]]
+
+def _unit(embedding) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+def get_answer_cache() -> AnswerCache:
+    global _answer_cache
+    if _answer_cache is None:
+        settings = get_settings()
+        _answer_cache = AnswerCache(
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            similarity_threshold=settings.ANSWER_CACHE_SIMILARITY,
+        )
+    return _answer_cache
@@ -0,0 +1,118 @@
+from array import array
+from typing import Iterable, Iterator, Optional
+import hashlib
+import re
+
+from langchain_core.documents import Document
+
+class TranscriptHasher:
+    """
+    Streaming equivalent of `hash_text(normalize_text(" ".join(texts)))`,
+    fed one segment at a time so the full transcript is never joined.
+    """
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self._first = True
+        self._started = False
+        self._prev_space = False
+        self._pending = ""
+
+    def update(self, text: str) -> None:
+        piece = text.lower()
+        if not self._first:
+            piece = " " + piece
+        self._first = False
+
+        piece = re.sub(r"\s+", " ", piece)
+        if self._prev_space and piece.startswith(" "):
+            piece = piece[1:]
+        if piece:
+            self._prev_space = piece.endswith(" ")
+
+        piece = re.sub(r"[^\w\s]", "", piece)
+        if not self._started:
+            piece = piece.lstrip()
+            if not piece:
+                return
+            self._started = True
+
+        # Trailing whitespace is held back until more text follows (strip()).
+        body = piece.rstrip()
+        if body:
+            self._hash.update((self._pending + body).encode("utf-8"))
+            self._pending = piece[len(body):]
+        else:
+            self._pending += piece
+
+    def hexdigest(self) -> str:
+        return self._hash.hexdigest()
+
+def hash_segments(segments: Iterable) -> str:
+    hasher = TranscriptHasher()
+    for segment in segments:
+        hasher.update(segment.text)
+    return hasher.hexdigest()
+
+class SegmentChunker:
+    """
+    Chunks a stream of transcript segments on segment boundaries.
+
+    Only the current window is held, as parallel arrays of segment start/end
+    seconds and character offsets. Chunks stay within `chunk_size` characters
+    (a single longer segment becomes its own chunk) and consecutive chunks
+    share up to `chunk_overlap` characters of trailing segments.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def split(self, segments: Iterable, metadata: Optional[dict] = None) -> Iterator[Document]:
+        metadata = metadata or {}
+        texts: list = []
+        starts, ends = array("d"), array("d")
+        offsets = array("Q")  # offset of each segment in the joined transcript
+        length = 0  # characters in the window, separators included
+        position = 0  # offset of the next segment in the joined transcript
+        emitted_end = -1  # offset one past the last segment already emitted
+
+        def emit():
+            text = " ".join(texts)
+            return Document(
+                page_content=text,
+                metadata={
+                    **metadata,
+                    "start_index": offsets[0],
+                    "start": round(starts[0], 3),
+                    "end": round(ends[-1], 3),
+                },
+            )
+
+        for segment in segments:
+            text = " ".join(segment.text.split())
+            if not text:
+                continue
+
+            added = len(text) + (1 if texts else 0)
+            if texts and length + added > self.chunk_size:
+                yield emit()
+                emitted_end = offsets[-1] + len(texts[-1])
+
+                # Keep trailing segments as overlap while they fit.
+                while texts and (
+                    length > self.chunk_overlap or length + added > self.chunk_size
+                ):
+                    length -= len(texts[0]) + (1 if len(texts) > 1 else 0)
+                    del texts[0], starts[0], ends[0], offsets[0]
+                added = len(text) + (1 if texts else 0)
+
+            texts.append(text)
+            starts.append(float(segment.start))
+            ends.append(float(segment.start) + float(segment.duration))
+            offsets.append(position)
+            length += added
+            position += len(text) + 1
+
+        if texts and offsets[-1] + len(texts[-1]) > emitted_end:
+            yield emit()
@@ -0,0 +1,100 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+DESCRIPTION_CHARS = 400
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text with Llama-3's tokenizer.
+    return len(text) // 4 + 1
+
+def _position(doc: Document):
+    return doc.metadata.get("start_index")
+
+def format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def merge_chunks(docs: Sequence[Document]) -> List[Tuple[str, Optional[float], Optional[float]]]:
+    """
+    Orders one video's chunks by transcript position and merges chunks that
+    overlap or touch. Chunks without a position are kept as-is, after the rest.
+
+    Returns (text, start seconds, end seconds) per excerpt; times are None
+    for chunks ingested without timestamps.
+    """
+    positioned = sorted(
+        (doc for doc in docs if _position(doc) is not None),
+        key=_position,
+    )
+    unpositioned = [
+        (doc.page_content, doc.metadata.get("start"), doc.metadata.get("end"))
+        for doc in docs if _position(doc) is None
+    ]
+
+    merged: List[List] = []  # [start_index, end_index, text, start, end]
+    for doc in positioned:
+        start = _position(doc)
+        text = doc.page_content
+        if merged and start <= merged[-1][1] + 1:
+            last = merged[-1]
+            new_tail = text[last[1] - start:] if start < last[1] else " " + text
+            if start + len(text) > last[1]:
+                last[2] += new_tail
+                last[1] = start + len(text)
+                last[4] = doc.metadata.get("end", last[4])
+            continue
+        merged.append([
+            start,
+            start + len(text),
+            text,
+            doc.metadata.get("start"),
+            doc.metadata.get("end"),
+        ])
+
+    return [(text, start, end) for _, _, text, start, end in merged] + unpositioned
+
+def _excerpt(i: int, text: str, start: Optional[float], end: Optional[float]) -> str:
+    if start is None or end is None:
+        return f"[{i}] {text.strip()}"
+    return f"[{i}] ({format_timestamp(start)}-{format_timestamp(end)}) {text.strip()}"
+
+def video_header(metadata: dict) -> str:
+    lines = [f"Video: {metadata.get('title') or metadata.get('video_id')}"]
+    if metadata.get("channel_name"):
+        lines.append(f"Channel: {metadata['channel_name']}")
+    if metadata.get("published_at"):
+        lines.append(f"Published: {metadata['published_at']}")
+    if metadata.get("tags"):
+        lines.append(f"Tags: {metadata['tags']}")
+    if metadata.get("description"):
+        description = metadata["description"]
+        if len(description) > DESCRIPTION_CHARS:
+            description = description[:DESCRIPTION_CHARS].rstrip() + "..."
+        lines.append(f"Description: {description}")
+    return "\n".join(lines)
+
+def render_context(selected: Sequence[Document]) -> str:
+    by_video: Dict[str, List[Document]] = {}
+    for doc in selected:
+        by_video.setdefault(doc.metadata.get("video_id", ""), []).append(doc)
+
+    sections = []
+    for docs in by_video.values():
+        excerpts = "\n\n".join(
+            _excerpt(i, *excerpt) for i, excerpt in enumerate(merge_chunks(docs), start=1)
+        )
+        sections.append(f"{video_header(docs[0].metadata)}\n\nTranscript excerpts:\n{excerpts}")
+    return "\n\n---\n\n".join(sections)
+
+def select_context(docs: Sequence[Document], token_budget: int) -> List[Document]:
+    """
+    Takes chunks in relevance order, skipping those whose addition would
+    make the rendered context exceed `token_budget`.
+    """
+    selected: List[Document] = []
+    for doc in docs:
+        if estimate_tokens(render_context(selected + [doc])) <= token_budget:
+            selected.append(doc)
+    return selected
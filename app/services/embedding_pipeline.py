@@ -0,0 +1,91 @@
+from concurrent.futures import FIRST_COMPLETED, Executor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+import random
+import time
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+# (chunk ids, chunks) going in, (chunk ids, chunks, vectors) coming out
+Batch = Tuple[List[str], List[Document]]
+EmbeddedBatch = Tuple[List[str], List[Document], List[List[float]]]
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, max(1, size)))
+        if not batch:
+            return
+        yield batch
+
+def embed_with_retry(
+    embeddings: Embeddings,
+    texts: List[str],
+    max_retries: int,
+    backoff_seconds: float,
+) -> List[List[float]]:
+    """
+    Embeds one batch, retrying failures with jittered exponential backoff.
+    """
+    attempt = 0
+    while True:
+        try:
+            return embeddings.embed_documents(texts)
+        except Exception:
+            if attempt >= max_retries:
+                raise
+            time.sleep(backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.0))
+            attempt += 1
+
+def embed_batches(
+    embeddings: Embeddings,
+    batches: Iterable[Batch],
+    executor: Executor,
+    concurrency: int,
+    max_retries: int,
+    backoff_seconds: float,
+    observe: Optional[Callable[[float], None]] = None,
+) -> Iterator[EmbeddedBatch]:
+    """
+    Embeds batches with up to `concurrency` requests in flight and yields
+    each one as soon as it completes (not necessarily in input order).
+    `observe` is called with each batch's embedding time, retries included.
+
+    `batches` is pulled lazily, so at most `concurrency` batches are held at
+    once. If a batch still fails after its retries, in-flight work is
+    cancelled and the error is raised.
+    """
+    batches = iter(batches)
+    pending = {}
+
+    def embed(texts: List[str]) -> List[List[float]]:
+        start = time.perf_counter()
+        try:
+            return embed_with_retry(embeddings, texts, max_retries, backoff_seconds)
+        finally:
+            if observe is not None:
+                observe(time.perf_counter() - start)
+
+    def submit() -> bool:
+        batch = next(batches, None)
+        if batch is None:
+            return False
+        ids, chunks = batch
+        future = executor.submit(embed, [chunk.page_content for chunk in chunks])
+        pending[future] = batch
+        return True
+
+    try:
+        while len(pending) < max(1, concurrency) and submit():
+            pass
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                ids, chunks = pending.pop(future)
+                yield ids, chunks, future.result()
+                submit()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,68 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.config import get_settings
+
+_session = None
+_session_lock = threading.Lock()
+_local = threading.local()
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that applies a default timeout to every request it sends.
+    """
+
+    def __init__(self, *args, timeout: float, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+def build_http_session(pool_size: int) -> requests.Session:
+    settings = get_settings()
+
+    retry = Retry(
+        total=settings.HTTP_MAX_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+    )
+    adapter = TimeoutHTTPAdapter(
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_http_session() -> requests.Session:
+    """
+    Process-wide keep-alive session for stateless API calls.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_http_session(get_settings().HTTP_POOL_SIZE)
+    return _session
+
+def get_thread_http_session() -> requests.Session:
+    """
+    Keep-alive session owned by the calling thread, for clients that keep
+    per-session state (cookies, headers) and are not thread-safe.
+    """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = build_http_session(pool_size=2)
+    return session
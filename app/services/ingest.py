@@ -1,55 +1,114 @@
-from youtube_transcript_api import YouTubeTranscriptApi, TranscriptsDisabled, NoTranscriptFound
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from sqlalchemy.orm import Session
-from typing import Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
+from concurrent.futures import Executor, ThreadPoolExecutor
 import os
-import requests
 import hashlib
 import re
+import threading
 
 from dotenv import load_dotenv
 
 from app.core.config import get_settings
-from app.db.vectorstore import get_vectorstore
-from app.auth.ingested_data import get_ingestion_metadata, upsert_ingestion_metadata
+from app.db.vectorstore import (
+    add_embedded_chunks,
+    build_vectorstore,
+    checkout_vectorstore,
+    invalidate_vectorstore,
+    list_chunk_ids,
+    publish_chunks,
+    video_store_path,
+)
+from app.db.lexical_index import LexicalIndexBuilder, lexical_index_path
+from app.db.transcript_cache import get_transcript_cache
+from app.auth.ingested_data import (
+    get_ingestion_metadata,
+    is_ingestion_fresh,
+    mark_ingestion_verified,
+    upsert_ingestion_metadata,
+)
 from app.db.user_db import SessionLocal
+from app.services.answer_cache import get_answer_cache
+from app.services.chunker import SegmentChunker, hash_segments
+from app.services.embedding_pipeline import batched, embed_batches
+from app.services.metrics import INGEST_CHUNKS, INGEST_REQUESTS, Timings
+from app.services.singleflight import SingleFlight, file_lock
+from app.services.http import get_http_session, get_thread_http_session
 
 load_dotenv()
 
+if TYPE_CHECKING:
+    # Imported on first use; the transcript client is slow to import.
+    from youtube_transcript_api import YouTubeTranscriptApi
+
 settings = get_settings()
 
-text_splitter = RecursiveCharacterTextSplitter(
+_ingest_flight = SingleFlight()
+
+chunker = SegmentChunker(
     chunk_size=settings.CHUNK_SIZE,
-    chunk_overlap=settings.CHUNK_OVERLAP
+    chunk_overlap=settings.CHUNK_OVERLAP,
+)
+
+_fetch_executor = ThreadPoolExecutor(
+    max_workers=settings.HTTP_POOL_SIZE,
+    thread_name_prefix="ingest-fetch",
+)
+_local = threading.local()
+
+_embed_executor = ThreadPoolExecutor(
+    max_workers=settings.EMBED_CONCURRENCY,
+    thread_name_prefix="ingest-embed",
 )
 
+def get_transcript_api() -> "YouTubeTranscriptApi":
+    # The transcript client keeps cookie state and is not thread-safe.
+    api = getattr(_local, "transcript_api", None)
+    if api is None:
+        from youtube_transcript_api import YouTubeTranscriptApi
+        api = _local.transcript_api = YouTubeTranscriptApi(
+            http_client=get_thread_http_session()
+        )
+    return api
+
 def get_transcript_list(video_id: str):
-    return YouTubeTranscriptApi().list(video_id=video_id)
+    return get_transcript_api().list(video_id=video_id)
 
-def resolve_transcript(video_id: str) -> Tuple[str, str, str]:
+def resolve_transcript(video_id: str, refresh: bool = False) -> Tuple[list, str, str]:
     """
     Returns:
-    - transcript text (english)
+    - transcript segments (english; `.text`, `.start`, `.duration`)
     - final language ("en")
     - source ("manual" | "auto" | "translated-hi")
+
+    Reads through the on-disk transcript cache unless `refresh` is set.
     """
+    cache = get_transcript_cache()
+    if not refresh:
+        cached = cache.get(video_id, "en")
+        if cached is not None:
+            return cached.segments, "en", cached.source
+
+    segments, language, source = fetch_transcript(video_id)
+    cache.put(video_id, language, segments, source)
+    return segments, language, source
+
+def fetch_transcript(video_id: str) -> Tuple[list, str, str]:
+    from youtube_transcript_api import NoTranscriptFound
 
     transcript_list = get_transcript_list(video_id)
 
     # 1. Manual English
     try:
         t = transcript_list.find_manually_created_transcript(["en"])
-        data = t.fetch()
-        return " ".join(x.text for x in data), "en", "manual"
+        return t.fetch(), "en", "manual"
     except NoTranscriptFound:
         pass
 
     # 2. Auto English
     try:
         t = transcript_list.find_generated_transcript(["en"])
-        data = t.fetch()
-        return " ".join(x.text for x in data), "en", "auto"
+        return t.fetch(), "en", "auto"
     except NoTranscriptFound:
         pass
 
@@ -73,14 +132,14 @@ def hash_text(text: str) -> str:
     ).hexdigest()
 
 def fetch_video_metadata(video_id: str, api_key: str) -> dict:
-    url = "https://www.googleapis.com/youtube/v3/videos"
+    url = f"{settings.YOUTUBE_API_BASE_URL}/videos"
     params = {
         "part": "snippet,contentDetails",
         "id": video_id,
         "key": api_key,
     }
 
-    res = requests.get(url, params=params)
+    res = get_http_session().get(url, params=params)
     res.raise_for_status()
 
     items = res.json().get("items", [])
@@ -99,66 +158,296 @@ def fetch_video_metadata(video_id: str, api_key: str) -> dict:
         "duration": content.get("duration"),
     }
 
-def ingest_youtube_threaded(video_id: str) -> int:
+def fetch_playlist_video_ids(playlist_id: str, api_key: str, max_videos: int) -> List[str]:
+    url = f"{settings.YOUTUBE_API_BASE_URL}/playlistItems"
+    params = {
+        "part": "contentDetails",
+        "playlistId": playlist_id,
+        "maxResults": 50,
+        "key": api_key,
+    }
+
+    video_ids: List[str] = []
+    while len(video_ids) < max_videos:
+        res = get_http_session().get(url, params=params)
+        res.raise_for_status()
+        payload = res.json()
+
+        video_ids.extend(item["contentDetails"]["videoId"] for item in payload.get("items", []))
+
+        params["pageToken"] = payload.get("nextPageToken")
+        if not params["pageToken"]:
+            break
+
+    return list(dict.fromkeys(video_ids))[:max_videos]
+
+def with_chunk_ids(video_id: str, chunks: Iterable[Document]) -> Iterator[Tuple[str, Document]]:
+    """
+    Deterministic chunk IDs derived from the chunk text and the embedding
+    model, so unchanged chunks keep their ID across re-ingests but never
+    survive a model change. Repeated texts are told apart by occurrence.
+    """
+    model = settings.EMBEDDING_MODEL
+    seen: Dict[str, int] = {}  # text hash -> occurrences so far
+    for chunk in chunks:
+        text = chunk.page_content
+        key = hash_text(text)
+        occurrence = seen.get(key, 0)
+        seen[key] = occurrence + 1
+        yield hash_text(f"{model}\x00{video_id}\x00{occurrence}\x00{text}"), chunk
+
+def embed_and_write(
+    vector_store,
+    batches: Iterable[Tuple[List[str], List[Document]]],
+    written: List[str],
+    timings: Timings,
+    executor: Optional[Executor] = None,
+) -> None:
+    """
+    Embeds batches concurrently (on `executor`, the shared ingest pool by
+    default) and writes each one as it completes, appending the written IDs
+    to `written` (so a failed run can be undone).
+    """
+    for ids, chunks, vectors in embed_batches(
+        vector_store.embeddings,
+        batches,
+        executor=executor or _embed_executor,
+        concurrency=settings.EMBED_CONCURRENCY,
+        max_retries=settings.EMBED_MAX_RETRIES,
+        backoff_seconds=settings.EMBED_RETRY_BACKOFF_SECONDS,
+        observe=lambda seconds: timings.record("embed", seconds),
+    ):
+        with timings.span("store_write"):
+            add_embedded_chunks(vector_store, ids, chunks, vectors)
+        written.extend(ids)
+
+def replace_chunks(
+    vector_store,
+    chunks: Iterable[Tuple[str, Document]],
+    timings: Timings,
+    executor: Optional[Executor] = None,
+):
+    def batches():
+        for batch in batched(chunks, settings.EMBED_BATCH_SIZE):
+            yield [chunk_id for chunk_id, _ in batch], [chunk for _, chunk in batch]
+
+    embed_and_write(vector_store, batches(), written=[], timings=timings, executor=executor)
+
+def write_chunks_incremental(
+    vector_store,
+    video_id: str,
+    chunks: Iterable[Tuple[str, Document]],
+    timings: Timings,
+    executor: Optional[Executor] = None,
+):
+    """
+    Upserts only new chunks and deletes only stale ones.
+
+    New chunks are written staged (hidden from readers), batch by batch; a
+    single metadata update then publishes them, refreshes the metadata of
+    unchanged ones and hides the stale ones, so readers see either the full
+    old set or the full new set.
+    """
+    with timings.span("store_write"):
+        existing = list_chunk_ids(vector_store, video_id)
+    current: set = set()
+    kept: Dict[str, dict] = {}  # unchanged chunk id -> its (merged) new metadata
+
+    def batches():
+        for batch in batched(chunks, settings.EMBED_BATCH_SIZE):
+            added_ids, added = [], []
+            for chunk_id, chunk in batch:
+                current.add(chunk_id)
+                if chunk_id in existing:
+                    kept[chunk_id] = chunk.metadata
+                else:
+                    added_ids.append(chunk_id)
+                    added.append(
+                        Document(
+                            page_content=chunk.page_content,
+                            metadata={**chunk.metadata, "staged": True},
+                        )
+                    )
+
+            if added:
+                yield added_ids, added
+
+    added_ids: List[str] = []
+    try:
+        embed_and_write(vector_store, batches(), written=added_ids, timings=timings, executor=executor)
+        stale = list(existing - current)
+        with timings.span("store_write"):
+            publish_chunks(vector_store, ids=list(current), retired_ids=stale, metadatas=kept)
+    except Exception as e:
+        if added_ids:
+            vector_store.delete(ids=added_ids)
+        raise e
+
+    if stale:
+        with timings.span("store_write"):
+            vector_store.delete(ids=stale)
+
+def store_chunks(
+    video_id: str,
+    chunks: Iterable[Document],
+    incremental: bool = True,
+    timings: Optional[Timings] = None,
+    executor: Optional[Executor] = None,
+) -> int:
+    """
+    Writes a video's full chunk set to its vector store and lexical index.
+    `chunks` is consumed once, as a stream; returns the number of chunks.
+
+    Without `incremental`, every chunk is re-embedded into a new store that
+    replaces the old one only once complete (so it also takes a new
+    embedding dimension). Shards are shared and cannot be rebuilt per video,
+    so with the shared layout writes are always incremental.
+    """
+    timings = timings or Timings("ingest")
+    lexical = LexicalIndexBuilder()
+
+    def tracked():
+        for chunk_id, chunk in with_chunk_ids(video_id, chunks):
+            lexical.add(chunk_id, chunk.page_content)
+            yield chunk_id, chunk
+
+    try:
+        if incremental or video_store_path(video_id) is None:
+            with checkout_vectorstore(video_id) as vector_store:
+                write_chunks_incremental(vector_store, video_id, tracked(), timings, executor)
+        else:
+            with build_vectorstore(video_id) as vector_store:
+                replace_chunks(vector_store, tracked(), timings, executor)
+    finally:
+        invalidate_vectorstore(video_id)
+
+    with timings.span("lexical_index"):
+        lexical.build().save(lexical_index_path(video_id))
+    return len(lexical.chunk_ids)
+
+def video_chunk_metadata(video_id: str, metadata: dict, language: str, source: str) -> dict:
+    return {
+        'source': 'youtube',
+        'video_id': video_id,
+        **metadata,
+        "tags": ", ".join(metadata["tags"]) if metadata.get("tags") else None,
+        "language": language,
+        "source_type": source,
+    }
+
+def ingest_lock_path(video_id: str, language: str = "en"):
+    # Held while a video's store is rewritten (ingest) or removed (eviction).
+    key = (video_id, language)
+    return settings.DATA_DIR / "locks" / f"ingest_{hash_text(repr(key))[:24]}.lock"
+
+def ingest_youtube_once(
+    video_id: str,
+    db: Session,
+    language: str = "en",
+    force: bool = False,
+    from_cache: bool = False,
+) -> int:
+    """
+    Runs `ingest_youtube` at most once at a time per (video, language,
+    force, from_cache).
+
+    Threads in this process share the in-flight result; other worker
+    processes serialize on a lock file under DATA_DIR and then hit the
+    committed transcript hash. A forced request never joins a non-forced
+    run (which may have short-circuited on freshness), nor a YouTube check
+    a cache read; they wait on the lock and run themselves.
+    """
+    key = (video_id, language, force, from_cache)
+
+    def run():
+        with file_lock(ingest_lock_path(video_id, language)):
+            return ingest_youtube(video_id, db, force=force, from_cache=from_cache)
+
+    return _ingest_flight.do(key, run)
+
+def ingest_youtube_threaded(video_id: str, force: bool = False) -> int:
     db = SessionLocal()
     try:
-        return ingest_youtube(video_id, db)
+        return ingest_youtube_once(video_id, db, force=force)
     except Exception:
         print("DB Connection failed!")
         raise
     finally:
         db.close()
 
-def ingest_youtube(video_id: str, db: Session) -> int:
+def ingest_youtube(video_id: str, db: Session, force: bool = False, from_cache: bool = False) -> int:
+    """
+    Ingests (or re-checks) a video against YouTube. `from_cache` reads the
+    transcript through the local cache instead, for rebuilding a store
+    whose transcript is already known (restoring an evicted video).
+    """
+    from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
+
+    timings = Timings("ingest")
+    outcome = "failed"
     try:
-        vector_store = get_vectorstore(video_id)
-        
-        transcript, language, source = resolve_transcript(video_id)
-        
-        normalized_transcript = normalize_text(transcript)
-        transcript_hash = hash_text(normalized_transcript)
+        with timings.span("freshness_check"):
+            metadata_record = get_ingestion_metadata(db=db, video_id=video_id, language='en')
+
+        # Verified recently: skip contacting YouTube at all.
+        if not force and is_ingestion_fresh(metadata_record, settings.INGEST_FRESHNESS_SECONDS):
+            outcome = "fresh"
+            return 0
+
+        def fetch_metadata():
+            with timings.span("metadata_fetch"):
+                return fetch_video_metadata(video_id=video_id, api_key=os.getenv("YOUTUBE_API_KEY"))
+
+        # New videos need metadata, so it is fetched while the transcript
+        # downloads. A re-check usually finds the hash unchanged, so there it
+        # is only fetched once the transcript turns out to have changed.
+        metadata_future = None
+        if metadata_record is None or force:
+            metadata_future = _fetch_executor.submit(fetch_metadata)
+
+        # An expired freshness window means asking YouTube again; a cached
+        # transcript would just confirm the stored hash.
+        with timings.span("transcript_fetch"):
+            segments, language, source = resolve_transcript(video_id, refresh=not from_cache)
         
-        metadata_record = get_ingestion_metadata(db=db, video_id=video_id, language='en') 
+        with timings.span("hash_check"):
+            transcript_hash = hash_segments(segments)
         
-        if metadata_record and metadata_record.transcript_hash == transcript_hash:
+        if not force and metadata_record and metadata_record.transcript_hash == transcript_hash:
+            mark_ingestion_verified(db, metadata_record)
+            outcome = "unchanged"
             return 0
         
-        vector_store.delete(where={"video_id": video_id})
+        metadata = metadata_future.result() if metadata_future is not None else fetch_metadata()
 
-        metadata = fetch_video_metadata(
-            video_id=video_id,
-            api_key=os.getenv("YOUTUBE_API_KEY")
+        chunks = timings.iterate(
+            "split",
+            chunker.split(
+                segments,
+                metadata=video_chunk_metadata(video_id, metadata, language, source),
+            ),
         )
 
-        normalized_metadata = {
-            **metadata,
-            "tags": ", ".join(metadata["tags"]) if metadata.get("tags") else None,
-            "language": language,
-            "source_type": source,
-        }
-
-        Docs = [
-            Document(
-                page_content=transcript,
-                metadata={
-                    'source': 'youtube',
-                    'video_id': video_id,
-                    **normalized_metadata
-                }
-            )
-        ]
-        
-        chunks = text_splitter.split_documents(Docs)
-
-        try:
-            vector_store.add_documents(chunks)
-        except Exception as e:
-            vector_store.delete(where={"video_id": video_id})
-            raise e
+        chunks_added = store_chunks(
+            video_id,
+            chunks,
+            incremental=settings.INGEST_INCREMENTAL,
+            timings=timings,
+        )
         
+        previous_hash = metadata_record.transcript_hash if metadata_record is not None else None
         upsert_ingestion_metadata(db=db, video_id=video_id, language='en', transcript_hash=transcript_hash)
+        # Answers are keyed by transcript hash; drop the ones that can no longer match.
+        if previous_hash is not None and previous_hash != transcript_hash:
+            get_answer_cache().invalidate(video_id)
 
-        return len(chunks)
+        outcome = "ingested"
+        INGEST_CHUNKS.observe(chunks_added)
+        return chunks_added
 
     except (TranscriptsDisabled, NoTranscriptFound):
-        raise
\ No newline at end of file
+        raise
+
+    finally:
+        INGEST_REQUESTS.labels(outcome).inc()
+        timings.finish()
\ No newline at end of file
@@ -0,0 +1,166 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+import logging
+import uuid
+
+from app.core.config import get_settings
+from app.auth.ingest_jobs import (
+    get_unfinished_ingest_job_items,
+    requeue_ingest_job_items,
+    update_ingest_job_item,
+)
+from app.db.user_db import SessionLocal
+from app.services.ingest import ingest_youtube_once
+from app.services.singleflight import file_lock, try_file_lock
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+# Job items live in this process's in-memory queue. Each process holds a
+# lock file named after WORKER_ID for its lifetime, so another process can
+# tell whether an item's owner is still alive.
+WORKER_ID = uuid.uuid4().hex
+_worker_lock = None
+
+def get_ingest_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_settings().INGEST_JOB_CONCURRENCY,
+            thread_name_prefix="ingest-job",
+        )
+    return _executor
+
+def shutdown_ingest_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    # Cancelled items are picked up by the next process to start.
+    release_worker_lock()
+
+def describe_ingest_error(e: Exception) -> str:
+    from youtube_transcript_api import TranscriptsDisabled, NoTranscriptFound
+
+    if isinstance(e, TranscriptsDisabled):
+        return "Transcripts are disabled for this video"
+    if isinstance(e, NoTranscriptFound):
+        return "No supported transcript found (English or Hindi)"
+    if isinstance(e, RuntimeError):
+        return str(e)
+    return f"Failed to ingest video {e}"
+
+def run_ingest_job_item(item_id: int, video_id: str, force: bool = False):
+    db = SessionLocal()
+    try:
+        update_ingest_job_item(db, item_id, status="running")
+        try:
+            chunks_added = ingest_youtube_once(video_id, db, force=force)
+        except Exception as e:
+            db.rollback()
+            update_ingest_job_item(db, item_id, status="failed", error=describe_ingest_error(e))
+            return
+
+        update_ingest_job_item(db, item_id, status="succeeded", chunks_added=chunks_added)
+    finally:
+        db.close()
+
+def submit_ingest_job(items: List[Tuple[int, str]], force: bool = False):
+    """
+    Queues every (item_id, video_id) of a job on the shared worker pool.
+    """
+    executor = get_ingest_executor()
+    for item_id, video_id in items:
+        executor.submit(run_ingest_job_item, item_id, video_id, force)
+
+def _worker_lock_path(worker_id: str):
+    return get_settings().DATA_DIR / "locks" / "ingest_workers" / f"{worker_id}.lock"
+
+def hold_worker_lock() -> None:
+    global _worker_lock
+    if _worker_lock is None:
+        _worker_lock = try_file_lock(_worker_lock_path(WORKER_ID))
+
+def release_worker_lock() -> None:
+    global _worker_lock
+    if _worker_lock is not None:
+        _worker_lock.close()
+        _worker_lock = None
+        _worker_lock_path(WORKER_ID).unlink(missing_ok=True)
+
+def _worker_alive(worker_id) -> bool:
+    if not worker_id:
+        return False
+    if worker_id == WORKER_ID:
+        return True
+
+    path = _worker_lock_path(worker_id)
+    if not path.exists():
+        return False
+    handle = try_file_lock(path)
+    if handle is None:
+        return True
+    # We got the lock, so the owner is gone.
+    handle.close()
+    path.unlink(missing_ok=True)
+    return False
+
+def recover_orphaned_ingest_jobs() -> int:
+    """
+    Requeues job items left queued or running by a process that exited
+    (shutdown cancels its queue; a crash loses it), so their jobs finish
+    instead of reporting "running" forever. Returns the number requeued.
+    """
+    hold_worker_lock()
+    with file_lock(get_settings().DATA_DIR / "locks" / "ingest_job_recovery.lock"):
+        db = SessionLocal()
+        try:
+            orphans = [
+                item for item in get_unfinished_ingest_job_items(db)
+                if not _worker_alive(item.worker_id)
+            ]
+            if not orphans:
+                return 0
+            requeue_ingest_job_items(db, orphans, WORKER_ID)
+            work = [(item.id, item.video_id, bool(item.force)) for item in orphans]
+        finally:
+            db.close()
+
+    executor = get_ingest_executor()
+    for item_id, video_id, force in work:
+        executor.submit(run_ingest_job_item, item_id, video_id, force)
+    logger.info("Requeued %d orphaned ingest job items", len(work))
+    return len(work)
+
+def summarize_ingest_job(job) -> dict:
+    counts = {"queued": 0, "running": 0, "succeeded": 0, "failed": 0}
+    for item in job.items:
+        counts[item.status] = counts.get(item.status, 0) + 1
+
+    if counts["queued"] == len(job.items):
+        status = "queued"
+    elif counts["queued"] or counts["running"]:
+        status = "running"
+    elif counts["failed"] == len(job.items):
+        status = "failed"
+    else:
+        status = "completed"
+
+    return {
+        "job_id": job.id,
+        "status": status,
+        "total": len(job.items),
+        **counts,
+        "items": [
+            {
+                "video_id": item.video_id,
+                "status": item.status,
+                "chunks_added": item.chunks_added,
+                "error": item.error,
+                "started_at": item.started_at,
+                "finished_at": item.finished_at,
+            }
+            for item in job.items
+        ],
+    }
@@ -0,0 +1,139 @@
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional
+import threading
+import time
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+STAGE_SECONDS = Histogram(
+    "rag_stage_seconds",
+    "Time spent per request in each pipeline stage",
+    ["pipeline", "stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+INGEST_REQUESTS = Counter(
+    "rag_ingest_requests_total",
+    "Ingest requests by outcome (fresh, unchanged, ingested, failed)",
+    ["outcome"],
+)
+INGEST_CHUNKS = Histogram(
+    "rag_ingest_chunks_per_video",
+    "Chunks written per ingested video",
+    buckets=(10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+CHAT_REQUESTS = Counter(
+    "rag_chat_requests_total",
+    "Chat requests by outcome (cached, completed, error, timeout, disconnected)",
+    ["outcome"],
+)
+CHAT_TOKENS = Counter("rag_chat_tokens_total", "Streamed answer chunks")
+STORE_EVICTIONS = Counter("rag_store_evictions_total", "Video stores evicted to stay under the disk quota")
+STORE_RESTORES = Counter(
+    "rag_store_restores_total",
+    "Evicted videos re-ingested on demand by outcome (restored, failed)",
+    ["outcome"],
+)
+
+class Timings:
+    """
+    Per-request stage timings. Spans of the same stage add up; `finish()`
+    reports the totals to the `rag_stage_seconds` histogram once.
+    """
+
+    def __init__(self, pipeline: str):
+        self.pipeline = pipeline
+        self.stages: Dict[str, float] = {}
+        self._lock = threading.Lock()  # embedding batches report from worker threads
+        self._finished = False
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def iterate(self, stage: str, items: Iterable) -> Iterator:
+        """
+        Yields from `items`, timing only the time spent producing them.
+        """
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.record(stage, time.perf_counter() - start)
+                return
+            self.record(stage, time.perf_counter() - start)
+            yield item
+
+    def record(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def finish(self) -> None:
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            stages = dict(self.stages)
+        for stage, seconds in stages.items():
+            STAGE_SECONDS.labels(self.pipeline, stage).observe(seconds)
+
+    def as_milliseconds(self) -> Dict[str, float]:
+        with self._lock:
+            return {stage: round(seconds * 1000, 3) for stage, seconds in self.stages.items()}
+
+def _cache_stats() -> Dict[str, dict]:
+    # Only caches that already exist are read; collecting must not create them.
+    from app.db import transcript_cache, vectorstore
+    from app.services import answer_cache
+
+    caches = {
+        "vectorstore_pool": vectorstore._pool,
+        "embedding": vectorstore._embedding_cache,
+        "transcript": transcript_cache._transcript_cache,
+        "answer": answer_cache._answer_cache,
+    }
+    return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+
+class CacheCollector:
+    """
+    Exposes the `stats()` of the process-wide caches at scrape time.
+    """
+
+    COUNTERS = ("hits", "semantic_hits", "misses", "evictions")
+
+    def collect(self):
+        counters = {
+            key: CounterMetricFamily(f"rag_cache_{key}", f"Cache {key.replace('_', ' ')}", labels=["cache"])
+            for key in self.COUNTERS
+        }
+        hit_ratio = GaugeMetricFamily("rag_cache_hit_ratio", "Cache hit ratio", labels=["cache"])
+        entries = GaugeMetricFamily("rag_cache_entries", "Entries held by the cache", labels=["cache"])
+        size_bytes = GaugeMetricFamily("rag_cache_bytes", "Bytes held by the cache", labels=["cache"])
+
+        for name, stats in _cache_stats().items():
+            for key, family in counters.items():
+                if key in stats:
+                    family.add_metric([name], stats[key])
+            hit_ratio.add_metric([name], stats["hit_rate"])
+            size = stats.get("entries", stats.get("size"))
+            if size is not None:
+                entries.add_metric([name], size)
+            if stats.get("bytes") is not None:
+                size_bytes.add_metric([name], stats["bytes"])
+
+        yield from counters.values()
+        yield from (hit_ratio, entries, size_bytes)
+
+_collector: Optional[CacheCollector] = None
+
+def register_cache_collector() -> None:
+    global _collector
+    if _collector is None:
+        _collector = CacheCollector()
+        REGISTRY.register(_collector)
@@ -0,0 +1,41 @@
+from collections import OrderedDict
+from typing import List, Tuple
+import os
+import threading
+import time
+
+from app.core.config import get_settings
+from app.core.schema import MAX_CHAT_VIDEOS
+from app.services.ingest import fetch_playlist_video_ids
+
+_CACHE_SIZE = 256
+_cache: "OrderedDict[str, Tuple[float, List[str]]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+def get_playlist_video_ids(playlist_id: str) -> List[str]:
+    """
+    Video IDs of a playlist (first MAX_CHAT_VIDEOS), cached for
+    PLAYLIST_CACHE_TTL_SECONDS so repeated questions don't hit the API.
+    """
+    ttl_seconds = get_settings().PLAYLIST_CACHE_TTL_SECONDS
+    now = time.monotonic()
+
+    with _cache_lock:
+        entry = _cache.get(playlist_id)
+        if entry is not None and now - entry[0] < ttl_seconds:
+            _cache.move_to_end(playlist_id)
+            return entry[1]
+
+    video_ids = fetch_playlist_video_ids(
+        playlist_id,
+        api_key=os.getenv("YOUTUBE_API_KEY"),
+        max_videos=MAX_CHAT_VIDEOS,
+    )
+
+    with _cache_lock:
+        _cache[playlist_id] = (now, video_ids)
+        _cache.move_to_end(playlist_id)
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+
+    return video_ids
@@ -1,26 +1,34 @@
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
-from langchain_core.runnables import RunnablePassthrough
-from langchain_core.output_parsers import StrOutputParser
-from langchain_cohere import CohereRerank
-from langchain_classic.retrievers import ContextualCompressionRetriever
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 
 from app.core.config import get_settings
-from app.db.vectorstore import get_vectorstore
+from app.db.vectorstore import get_embeddings
+from app.db.user_db import SessionLocal
+from app.auth.ingested_data import get_ingested_video_ids, get_ingestion_metadata
+from app.services.answer_cache import get_answer_cache
+from app.services.playlists import get_playlist_video_ids
+from app.services.retrieval import retrieve_documents, retrieve_documents_multi
+from app.services.store_eviction import (
+    get_access_tracker,
+    is_evicted,
+    restore_evicted_videos,
+    restore_video,
+)
+from app.services.context import render_context, select_context
+from app.services.metrics import CHAT_REQUESTS, CHAT_TOKENS, Timings
 
+from contextlib import suppress
+import asyncio
 import json
+import time
 
-llm = HuggingFaceEndpoint(
-    repo_id="meta-llama/Meta-Llama-3-8B-Instruct",
-    task='text-generation',
-    temperature=0.3,
-    streaming=True
-)
-
-model = ChatHuggingFace(llm = llm)
+# The LLM client, prompt and chain are built on first use: importing the
+# HuggingFace/LangChain stack dominates worker start-up time.
+_model = None
+_chain = None
 
-prompt = ChatPromptTemplate.from_messages([
+PROMPT_MESSAGES = [
     ('system',
         "You are a precise and structured assistant.\n"
         "Answer the question using ONLY the provided context.\n"
@@ -34,62 +42,266 @@ prompt = ChatPromptTemplate.from_messages([
     ),
     # MessagesPlaceholder(variable_name='history'),
     ('human', "{question}")
-])
+]
 
-def stream_chain(chain, question):
-    try:
-        for chunk in chain.stream(question):
-            if chunk:
-                payload = {
-                    "event": "message",
-                    "data": chunk
-                }
-                yield f"{json.dumps(payload)}\n\n"
+def get_model():
+    global _model
+    if _model is None:
+        from langchain_huggingface import ChatHuggingFace, HuggingFaceEndpoint
 
-        yield f"{json.dumps({'event': 'end'})}\n\n"
+        llm = HuggingFaceEndpoint(
+            repo_id="meta-llama/Meta-Llama-3-8B-Instruct",
+            task='text-generation',
+            temperature=0.3,
+            streaming=True
+        )
+        _model = ChatHuggingFace(llm = llm)
+    return _model
 
-    except Exception as e:
-        yield f"{json.dumps({'event': 'error', 'data': str(e)})}\n\n"
+def build_prompt():
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages(PROMPT_MESSAGES)
 
-def chat(username: str, video_id: str, question: str):
-    # history = get_chat_history(username, video_id)
-    # settings = get_settings()
+def timing_event(timings: Timings) -> str:
+    return f"{json.dumps({'event': 'timing', 'data': timings.as_milliseconds()})}\n\n"
 
-    vector_store = get_vectorstore(video_id)
+async def stream_chain(chain, inputs, request=None, on_complete=None, timings=None, sources=None):
+    """
+    Streams the chain's tokens as SSE events. When a `sources` list is given
+    (filled in by the retrieval step), it is sent as a `sources` event
+    before the first token.
 
-    base_retriever = vector_store.as_retriever(
-        search_type='mmr',
-        search_kwargs={
-            'k': 10,
-            'lambda_mult': 0.4,
-            'fetch_k': 20
-        }
-    )
+    Generation runs in a producer task feeding a bounded queue, so a slow
+    client applies backpressure upstream. The producer is cancelled when the
+    client disconnects, the stream goes idle, or the response is closed.
+    """
+    settings = get_settings()
+    timings = timings or Timings("chat")
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.CHAT_STREAM_BUFFER)
+    done = object()
+    started = time.perf_counter()
+    first_token = None
+    outcome = "disconnected"
 
-    reranker = CohereRerank(
-        model="rerank-english-v3.0",
-        top_n=4
-    )
+    async def produce():
+        try:
+            async for chunk in chain.astream(inputs):
+                if chunk:
+                    await queue.put(chunk)
+            await queue.put(done)
+        except Exception as e:
+            await queue.put(e)
 
-    retriever = ContextualCompressionRetriever(
-        base_compressor=reranker,
-        base_retriever=base_retriever
-    )
+    producer = asyncio.create_task(produce())
+    parts = []
+    try:
+        while True:
+            if request is not None and await request.is_disconnected():
+                break
 
-    chain = {
-        "context": lambda _: retriever.invoke(question),
-        "question": RunnablePassthrough(),
-        # "history": lambda _: history.messages[-settings.MAX_HISTORY_MESSAGES:]
-    } | prompt | model | StrOutputParser()
+            try:
+                item = await asyncio.wait_for(
+                    queue.get(),
+                    timeout=settings.CHAT_STREAM_IDLE_TIMEOUT_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                yield f"{json.dumps({'event': 'error', 'data': 'Answer generation timed out'})}\n\n"
+                break
 
-    # history.add_user_message(question)
-    # history.add_ai_message(answer)
+            if item is done:
+                outcome = "completed"
+                if first_token is not None:
+                    timings.record("generate", time.perf_counter() - first_token)
+                timings.record("total", time.perf_counter() - started)
+                if on_complete is not None:
+                    on_complete("".join(parts))
+                if settings.CHAT_TIMING_EVENT:
+                    yield timing_event(timings)
+                yield f"{json.dumps({'event': 'end'})}\n\n"
+                break
 
+            if isinstance(item, Exception):
+                outcome = "error"
+                yield f"{json.dumps({'event': 'error', 'data': str(item)})}\n\n"
+                break
+
+            if first_token is None:
+                first_token = time.perf_counter()
+                timings.record("ttft", first_token - started)
+                if sources is not None:
+                    yield f"{json.dumps({'event': 'sources', 'data': sources})}\n\n"
+            CHAT_TOKENS.inc()
+            parts.append(item)
+            payload = {
+                "event": "message",
+                "data": item
+            }
+            yield f"{json.dumps(payload)}\n\n"
+    finally:
+        producer.cancel()
+        with suppress(asyncio.CancelledError):
+            await producer
+        CHAT_REQUESTS.labels(outcome).inc()
+        timings.finish()
+
+async def stream_cached_answer(answer: str, timings: Timings):
+    CHAT_REQUESTS.labels("cached").inc()
+    timings.finish()
+    yield f"{json.dumps({'event': 'message', 'data': answer})}\n\n"
+    if get_settings().CHAT_TIMING_EVENT:
+        yield timing_event(timings)
+    yield f"{json.dumps({'event': 'end'})}\n\n"
+
+def sse_response(events):
     return StreamingResponse(
-        stream_chain(chain, question),
+        events,
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
         },
     )
+
+def get_transcript_hash(video_id: str):
+    db = SessionLocal()
+    try:
+        record = get_ingestion_metadata(db=db, video_id=video_id, language="en")
+        return record.transcript_hash if record else None
+    finally:
+        db.close()
+
+def _retrieve_context(inputs: dict) -> str:
+    timings = inputs.get("timings") or Timings("chat")
+    if "video_ids" in inputs:
+        docs = retrieve_documents_multi(inputs["video_ids"], inputs["question"], timings=timings)
+    else:
+        docs = retrieve_documents(inputs["video_id"], inputs["question"], timings=timings)
+
+    with timings.span("pack_context"):
+        selected = select_context(docs, token_budget=get_settings().CONTEXT_TOKEN_BUDGET)
+        context = render_context(selected)
+
+    sources = inputs.get("sources")
+    if sources is not None:
+        sources.extend(dict.fromkeys(doc.metadata.get("video_id") for doc in selected))
+    return context
+
+def get_chain():
+    """
+    Shared chat chain. Takes {"video_id", "question"} or {"video_ids",
+    "question"} (and optionally the request's "timings" and a "sources" list
+    to fill with the cited video ids) as runtime input, so it is built once
+    instead of per request.
+    """
+    global _chain
+    if _chain is None:
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.runnables import RunnableLambda, RunnablePassthrough
+
+        _chain = (
+            RunnablePassthrough.assign(
+                context=RunnableLambda(_retrieve_context),
+                # history=lambda _: history.messages[-settings.MAX_HISTORY_MESSAGES:],
+            )
+            | build_prompt()
+            | get_model()
+            | StrOutputParser()
+        )
+    return _chain
+
+def lookup_cached_answer(video_id: str, question: str):
+    """
+    Returns (transcript_hash, question embedding, cached answer or None).
+    """
+    transcript_hash = get_transcript_hash(video_id)
+    if not transcript_hash:
+        return None, None, None
+
+    cache = get_answer_cache()
+    answer = cache.get(video_id, transcript_hash, question)
+    if answer is not None:
+        return transcript_hash, None, answer
+
+    embedding = get_embeddings().embed_query(question)
+    return transcript_hash, embedding, cache.get_similar(video_id, transcript_hash, embedding)
+
+async def chat(request: Request, username: str, video_id: str, question: str):
+    # history = get_chat_history(username, video_id)
+    settings = get_settings()
+    timings = Timings("chat")
+
+    # An evicted video is rebuilt before answering rather than answered from an empty store.
+    if settings.STORE_REINGEST_ON_CHAT and is_evicted(video_id):
+        with timings.span("restore"):
+            try:
+                await run_in_threadpool(restore_video, video_id)
+            except RuntimeError as e:
+                raise HTTPException(status_code=404, detail=str(e))
+    get_access_tracker().touch([video_id])
+
+    on_complete = None
+    if settings.ANSWER_CACHE_ENABLED:
+        with timings.span("cache_lookup"):
+            transcript_hash, embedding, answer = await run_in_threadpool(
+                lookup_cached_answer, video_id, question
+            )
+        if answer is not None:
+            return sse_response(stream_cached_answer(answer, timings))
+
+        if transcript_hash:
+            def on_complete(answer: str):
+                get_answer_cache().put(video_id, transcript_hash, question, answer, embedding)
+
+    # history.add_user_message(question)
+    # history.add_ai_message(answer)
+
+    return sse_response(
+        stream_chain(
+            get_chain(),
+            {"video_id": video_id, "question": question, "timings": timings},
+            request=request,
+            on_complete=on_complete,
+            timings=timings,
+        )
+    )
+
+def resolve_chat_videos(video_ids, playlist_id) -> list:
+    if playlist_id is not None:
+        video_ids = get_playlist_video_ids(playlist_id)
+
+    db = SessionLocal()
+    try:
+        ingested = get_ingested_video_ids(db, video_ids)
+    finally:
+        db.close()
+
+    # Evicted videos are restored; never-ingested ones are skipped rather
+    # than ingested mid-request.
+    if get_settings().STORE_REINGEST_ON_CHAT:
+        ingested |= restore_evicted_videos(v for v in video_ids if v not in ingested)
+    return [video_id for video_id in video_ids if video_id in ingested]
+
+async def chat_videos(request: Request, username: str, question: str, video_ids=None, playlist_id=None):
+    """
+    Chat over several videos (a list or a playlist). Videos that haven't
+    been ingested (or can't be restored) are skipped; the answer is preceded by a `sources` event
+    listing the videos the context was drawn from, even when only one video
+    remains.
+    """
+    video_ids = await run_in_threadpool(resolve_chat_videos, video_ids, playlist_id)
+    if not video_ids:
+        raise HTTPException(status_code=404, detail="None of the requested videos have been ingested")
+
+    get_access_tracker().touch(video_ids)
+    timings = Timings("chat")
+    sources = []
+    return sse_response(
+        stream_chain(
+            get_chain(),
+            {"video_ids": video_ids, "question": question, "timings": timings, "sources": sources},
+            request=request,
+            timings=timings,
+            sources=sources,
+        )
+    )
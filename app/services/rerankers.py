@@ -0,0 +1,101 @@
+from collections import Counter
+from typing import Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+
+from app.core.config import get_settings
+from app.db.lexical_index import tokenize
+
+_reranker = None
+_reranker_loaded = False
+
+def bm25_scores(
+    query: str,
+    texts: Sequence[str],
+    k1: float = 1.5,
+    b: float = 0.75,
+) -> np.ndarray:
+    """
+    BM25 of `query` against each text, with IDF taken over `texts` themselves.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms or not texts:
+        return np.zeros(len(texts), dtype=np.float32)
+
+    tf = np.zeros((len(texts), len(terms)), dtype=np.float32)
+    lengths = np.zeros(len(texts), dtype=np.float32)
+    for row, text in enumerate(texts):
+        counts = Counter(tokenize(text))
+        lengths[row] = sum(counts.values())
+        tf[row] = [counts.get(term, 0) for term in terms]
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(texts) - df + 0.5) / (df + 0.5))
+    norm = k1 * (1 - b + b * lengths / max(float(lengths.mean()), 1.0))
+
+    return ((tf * (k1 + 1)) / (tf + norm[:, None])) @ idf
+
+def _min_max(scores: np.ndarray) -> np.ndarray:
+    spread = float(scores.max() - scores.min()) if scores.size else 0.0
+    if spread == 0.0:
+        return np.zeros_like(scores)
+    return (scores - scores.min()) / spread
+
+class LocalReranker(BaseDocumentCompressor):
+    """
+    In-process reranker fusing BM25 over the candidates with their dense
+    retrieval order (candidates arrive ranked by the vector search).
+    """
+
+    top_n: int = 4
+    lexical_weight: float = 0.5
+    k1: float = 1.5
+    b: float = 0.75
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks=None,
+    ) -> Sequence[Document]:
+        documents = list(documents)
+        if not documents:
+            return []
+
+        lexical = _min_max(
+            bm25_scores(query, [doc.page_content for doc in documents], self.k1, self.b)
+        )
+        dense = 1.0 - np.arange(len(documents), dtype=np.float32) / len(documents)
+        scores = self.lexical_weight * lexical + (1.0 - self.lexical_weight) * dense
+
+        order = np.argsort(-scores, kind="stable")[: self.top_n]
+        return [
+            Document(
+                page_content=documents[i].page_content,
+                metadata={**documents[i].metadata, "relevance_score": float(scores[i])},
+            )
+            for i in order
+        ]
+
+def build_reranker(name: str, top_n: int) -> Optional[BaseDocumentCompressor]:
+    if name == "cohere":
+        from langchain_cohere import CohereRerank
+        return CohereRerank(model="rerank-english-v3.0", top_n=top_n)
+    if name == "local":
+        return LocalReranker(top_n=top_n)
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown reranker: {name}")
+
+def get_reranker() -> Optional[BaseDocumentCompressor]:
+    """
+    Shared reranker selected by `Settings.RERANKER` ("cohere" | "local" | "none").
+    """
+    global _reranker, _reranker_loaded
+    if not _reranker_loaded:
+        settings = get_settings()
+        _reranker = build_reranker(settings.RERANKER, settings.RERANK_TOP_N)
+        _reranker_loaded = True
+    return _reranker
@@ -0,0 +1,174 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Sequence, Tuple
+import heapq
+import itertools
+
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+
+from app.core.config import get_settings
+from app.db.lexical_index import load_lexical_index
+from app.db.vectorstore import checkout_vectorstore, get_embeddings, video_filter
+from app.services.metrics import Timings
+from app.services.rerankers import get_reranker
+
+_fanout_executor = None
+
+def get_fanout_executor() -> ThreadPoolExecutor:
+    global _fanout_executor
+    if _fanout_executor is None:
+        _fanout_executor = ThreadPoolExecutor(
+            max_workers=get_settings().CHAT_FANOUT_CONCURRENCY,
+            thread_name_prefix="chat-fanout",
+        )
+    return _fanout_executor
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[str]:
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.__getitem__, reverse=True)
+
+def hybrid_search(
+    vector_store,
+    video_id: str,
+    query: str,
+    k: int,
+    fetch_k: int,
+    lambda_mult: float,
+    top_n: int,
+    reranker: Optional[BaseDocumentCompressor],
+    skip_rerank_overlap: float,
+    timings: Optional[Timings] = None,
+) -> List[Document]:
+    """
+    Fuses dense MMR results with the video's BM25 index (reciprocal rank
+    fusion). The reranker only runs when the two rankings disagree.
+    """
+    timings = timings or Timings("chat")
+
+    with timings.span("retrieve"):
+        dense = vector_store.max_marginal_relevance_search(
+            query,
+            k=k,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            filter=video_filter(video_id),
+        )
+        by_id = {doc.id: doc for doc in dense if doc.id}
+
+        index = load_lexical_index(video_id)
+        lexical_ids = [chunk_id for chunk_id, _ in index.search(query, k)] if index else []
+
+        dense_ids = [doc.id for doc in dense if doc.id]
+        fused_ids = reciprocal_rank_fusion([dense_ids, lexical_ids])[:k]
+
+        missing = [chunk_id for chunk_id in fused_ids if chunk_id not in by_id]
+        if missing:
+            found = vector_store.get(ids=missing, where=video_filter(video_id))
+            for chunk_id, text, metadata in zip(found["ids"], found["documents"], found["metadatas"]):
+                by_id[chunk_id] = Document(id=chunk_id, page_content=text, metadata=metadata or {})
+
+        fused = [by_id[chunk_id] for chunk_id in fused_ids if chunk_id in by_id]
+
+    agreement = len(set(dense_ids[:top_n]) & set(lexical_ids[:top_n])) / top_n
+    if reranker is None or agreement >= skip_rerank_overlap:
+        return fused[:top_n]
+
+    with timings.span("rerank"):
+        return list(reranker.compress_documents(fused, query))
+
+def retrieve_documents(
+    video_id: str,
+    question: str,
+    timings: Optional[Timings] = None,
+) -> List[Document]:
+    """
+    Retrieval stage of the chat chain: MMR (optionally fused with BM25),
+    then the configured reranker.
+    """
+    settings = get_settings()
+    timings = timings or Timings("chat")
+    reranker = get_reranker()
+
+    with checkout_vectorstore(video_id) as vector_store:
+        if settings.RETRIEVAL_MODE == "hybrid":
+            return hybrid_search(
+                vector_store,
+                video_id,
+                question,
+                k=10,
+                fetch_k=settings.HYBRID_FETCH_K,
+                lambda_mult=0.4,
+                top_n=settings.RERANK_TOP_N,
+                reranker=reranker,
+                skip_rerank_overlap=settings.HYBRID_SKIP_RERANK_OVERLAP,
+                timings=timings,
+            )
+
+        with timings.span("retrieve"):
+            docs = vector_store.max_marginal_relevance_search(
+                question,
+                k=10,
+                fetch_k=20,
+                lambda_mult=0.4,
+                filter=video_filter(video_id),
+            )
+    if reranker is not None:
+        with timings.span("rerank"):
+            docs = list(reranker.compress_documents(docs, question))
+    return docs
+
+def search_video(video_id: str, embedding: List[float], k: int) -> List[Tuple[Document, float]]:
+    # (chunk, distance) pairs; lower distance is more similar.
+    with checkout_vectorstore(video_id) as vector_store:
+        return vector_store.similarity_search_by_vector_with_relevance_scores(
+            embedding,
+            k=k,
+            filter=video_filter(video_id),
+        )
+
+def retrieve_documents_multi(
+    video_ids: Sequence[str],
+    question: str,
+    timings: Optional[Timings] = None,
+) -> List[Document]:
+    """
+    Retrieval across several videos: the question is embedded once, each
+    video's store is searched in parallel, the closest candidates overall
+    are kept in a bounded heap and the reranker runs once over them.
+    """
+    settings = get_settings()
+    timings = timings or Timings("chat")
+    fetch_k = settings.MULTI_VIDEO_FETCH_K
+
+    with timings.span("embed_query"):
+        embedding = get_embeddings().embed_query(question)
+
+    with timings.span("retrieve"):
+        futures = [
+            get_fanout_executor().submit(
+                search_video, video_id, embedding, settings.MULTI_VIDEO_PER_VIDEO_K
+            )
+            for video_id in video_ids
+        ]
+
+        # Max-heap on distance (negated), so the worst kept candidate is popped first.
+        heap: List[Tuple[float, int, Document]] = []
+        order = itertools.count()
+        for future in as_completed(futures):
+            for doc, distance in future.result():
+                item = (-distance, next(order), doc)
+                if len(heap) < fetch_k:
+                    heapq.heappush(heap, item)
+                else:
+                    heapq.heappushpop(heap, item)
+
+        candidates = [doc for _, _, doc in sorted(heap, key=lambda item: (-item[0], item[1]))]
+
+    reranker = get_reranker()
+    if reranker is not None:
+        with timings.span("rerank"):
+            candidates = list(reranker.compress_documents(candidates, question))
+    return candidates
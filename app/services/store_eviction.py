@@ -0,0 +1,256 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+import asyncio
+import logging
+import threading
+import time
+
+from app.core.config import get_settings
+from app.db.user_db import SessionLocal
+from app.db.lexical_index import delete_lexical_index, lexical_index_path
+from app.db.vectorstore import delete_vectorstore, video_store_root
+from app.auth.ingested_data import (
+    delete_ingestion_metadata,
+    get_ingested_video_ids,
+    get_ingestion_last_used,
+    record_video_access,
+)
+from app.services.answer_cache import get_answer_cache
+from app.services.ingest import ingest_lock_path, ingest_youtube_once
+from app.services.ingest_jobs import describe_ingest_error
+from app.services.metrics import STORE_EVICTIONS, STORE_RESTORES
+from app.services.singleflight import file_lock
+
+logger = logging.getLogger(__name__)
+
+_tracker = None
+_restore_executor = None
+
+class AccessTracker:
+    """
+    Buffers per-video chat access times in memory, so the chat path never
+    writes to the database; `flush()` stores them in one batch.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    def touch(self, video_ids: Iterable[str]) -> None:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for video_id in video_ids:
+                self._pending[video_id] = now
+
+    def is_pending(self, video_id: str) -> bool:
+        with self._lock:
+            return video_id in self._pending
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        db = SessionLocal()
+        try:
+            record_video_access(db, pending)
+        except Exception:
+            # Keep them for the next flush (newer touches win).
+            with self._lock:
+                for video_id, accessed_at in pending.items():
+                    self._pending.setdefault(video_id, accessed_at)
+            raise
+        finally:
+            db.close()
+        return len(pending)
+
+def get_access_tracker() -> AccessTracker:
+    global _tracker
+    if _tracker is None:
+        _tracker = AccessTracker()
+    return _tracker
+
+def _path_bytes(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+def store_usage() -> Dict[str, int]:
+    """
+    Bytes on disk per video (its store directory plus its lexical index).
+    Empty with the shared layout, where videos have no directory of their own.
+    """
+    root = video_store_root()
+    if root is None or not root.exists():
+        return {}
+
+    usage = {}
+    for path in root.glob("video_*"):
+        if not path.is_dir():
+            continue
+        video_id = path.name[len("video_"):]
+        lexical = lexical_index_path(video_id)
+        usage[video_id] = _path_bytes(path) + (lexical.stat().st_size if lexical.exists() else 0)
+    return usage
+
+def tombstone_path(video_id: str) -> Path:
+    return get_settings().DATA_DIR / "evicted" / video_id
+
+def evict_video(video_id: str) -> bool:
+    """
+    Removes a video's metadata row, vector store and lexical index. An
+    ingested video leaves a tombstone, so the next chat restores it. Runs
+    under the video's ingest lock, so it never races a (re-)ingest.
+    """
+    with file_lock(ingest_lock_path(video_id)):
+        if get_access_tracker().is_pending(video_id):
+            return False
+
+        # Tombstone, then row: a crash in between leaves an orphaned
+        # directory (swept later), never a row pointing at an empty store.
+        db = SessionLocal()
+        try:
+            if get_ingested_video_ids(db, [video_id]):
+                tombstone = tombstone_path(video_id)
+                tombstone.parent.mkdir(parents=True, exist_ok=True)
+                tombstone.touch()
+            delete_ingestion_metadata(db, video_id)
+        finally:
+            db.close()
+
+        delete_vectorstore(video_id)
+        delete_lexical_index(video_id)
+        get_answer_cache().invalidate(video_id)
+
+    STORE_EVICTIONS.inc()
+    return True
+
+def sweep_stores(
+    quota_bytes: Optional[int] = None,
+    min_idle_seconds: Optional[int] = None,
+    dry_run: bool = False,
+) -> List[str]:
+    """
+    Evicts least recently used video stores until usage is back under 90%
+    of the quota. Videos used within `min_idle_seconds` are never evicted.
+    Returns the evicted (or, with `dry_run`, evictable) video ids.
+    """
+    settings = get_settings()
+    quota_bytes = settings.STORE_DISK_QUOTA_BYTES if quota_bytes is None else quota_bytes
+    if min_idle_seconds is None:
+        min_idle_seconds = settings.STORE_EVICTION_MIN_IDLE_SECONDS
+    if quota_bytes <= 0:
+        return []
+
+    # One sweep at a time across worker processes.
+    with file_lock(settings.DATA_DIR / "locks" / "store_sweep.lock"):
+        get_access_tracker().flush()
+
+        usage = store_usage()
+        total = sum(usage.values())
+        if total <= quota_bytes:
+            return []
+
+        db = SessionLocal()
+        try:
+            last_used = get_ingestion_last_used(db)
+        finally:
+            db.close()
+
+        root = video_store_root()
+
+        def last_use(video_id: str) -> datetime:
+            # Directories without a row (interrupted ingests) age by mtime.
+            if video_id in last_used:
+                return last_used[video_id]
+            mtime = (root / f"video_{video_id}").stat().st_mtime
+            return datetime.fromtimestamp(mtime, timezone.utc)
+
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_idle_seconds)
+        evicted = []
+        for video_id in sorted(usage, key=last_use):
+            if total <= quota_bytes * 0.9 or last_use(video_id) > cutoff:
+                break
+            if not dry_run and not evict_video(video_id):
+                continue
+            total -= usage[video_id]
+            evicted.append(video_id)
+
+        return evicted
+
+def get_restore_executor() -> ThreadPoolExecutor:
+    # Kept apart from the batch ingest pool, so chat never queues behind jobs.
+    global _restore_executor
+    if _restore_executor is None:
+        _restore_executor = ThreadPoolExecutor(
+            max_workers=get_settings().STORE_RESTORE_CONCURRENCY,
+            thread_name_prefix="store-restore",
+        )
+    return _restore_executor
+
+def is_evicted(video_id: str) -> bool:
+    # A file check, so the chat path needs no database query.
+    return tombstone_path(video_id).exists()
+
+def restore_video(video_id: str) -> None:
+    """
+    Re-ingests an evicted video, from the transcript cache when it still
+    holds the transcript and from YouTube otherwise, then clears its
+    tombstone. Raises RuntimeError if ingestion fails.
+    """
+    db = SessionLocal()
+    try:
+        # Re-ingested through the API since: nothing to restore.
+        if not get_ingested_video_ids(db, [video_id]):
+            ingest_youtube_once(video_id, db, from_cache=True)
+    except Exception as e:
+        STORE_RESTORES.labels("failed").inc()
+        raise RuntimeError(describe_ingest_error(e)) from e
+    finally:
+        db.close()
+    tombstone_path(video_id).unlink(missing_ok=True)
+    STORE_RESTORES.labels("restored").inc()
+
+def restore_evicted_videos(video_ids: Iterable[str]) -> Set[str]:
+    """
+    Re-ingests, in parallel, those of `video_ids` that were evicted.
+    Returns the restored ids.
+    """
+    candidates = [video_id for video_id in video_ids if is_evicted(video_id)]
+    futures = {video_id: get_restore_executor().submit(restore_video, video_id) for video_id in candidates}
+
+    restored = set()
+    for video_id, future in futures.items():
+        try:
+            future.result()
+            restored.add(video_id)
+        except RuntimeError:
+            pass
+    return restored
+
+async def run_store_maintenance() -> None:
+    """
+    Background loop: flushes buffered access times and, when a quota is
+    set, sweeps cold stores every STORE_EVICTION_INTERVAL_SECONDS.
+    """
+    settings = get_settings()
+    loop = asyncio.get_running_loop()
+    last_sweep = time.monotonic()
+
+    while True:
+        await asyncio.sleep(settings.STORE_ACCESS_FLUSH_SECONDS)
+        try:
+            await loop.run_in_executor(None, get_access_tracker().flush)
+            if (
+                settings.STORE_DISK_QUOTA_BYTES > 0
+                and time.monotonic() - last_sweep >= settings.STORE_EVICTION_INTERVAL_SECONDS
+            ):
+                last_sweep = time.monotonic()
+                evicted = await loop.run_in_executor(None, sweep_stores)
+                if evicted:
+                    logger.info("Evicted %d cold video stores", len(evicted))
+        except Exception:
+            logger.exception("Store maintenance failed")
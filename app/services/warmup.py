@@ -0,0 +1,28 @@
+import threading
+
+_warm = threading.Event()
+_lock = threading.Lock()
+
+def warm_up() -> None:
+    """
+    Initializes the lazily loaded clients (and their imports) so the first
+    chat/ingest request does not pay for them. Safe to call repeatedly.
+    """
+    with _lock:
+        if _warm.is_set():
+            return
+
+        import langchain_chroma  # noqa: F401  (vector stores open lazily)
+        import youtube_transcript_api  # noqa: F401
+
+        from app.db.vectorstore import get_embeddings
+        from app.services.rag import get_chain
+        from app.services.rerankers import get_reranker
+
+        get_embeddings()
+        get_reranker()
+        get_chain()
+        _warm.set()
+
+def is_warm() -> bool:
+    return _warm.is_set()
@@ -0,0 +1,107 @@
+"""
+Offline migration from the per-video layout (`CHROMA_DIR/video_*`) into the
+shared, shard-partitioned collection layout.
+
+Vectors are copied as stored, so nothing is re-embedded:
+
+    python -m app.tools.migrate_vectorstore [--batch-size 500] [--remove-source]
+"""
+from pathlib import Path
+import argparse
+import shutil
+
+import chromadb
+
+from app.core.config import get_settings
+from app.db.vectorstore import checkout_shared_vectorstore, release_chroma_system
+
+SOURCE_COLLECTION = "langchain"
+
+def iter_video_dirs(chroma_dir: Path):
+    for path in sorted(chroma_dir.glob("video_*")):
+        if path.is_dir():
+            yield path.name[len("video_"):], path
+
+def migrate_video(video_id: str, path: Path, batch_size: int) -> tuple:
+    """
+    Copies one video's vectors; returns (copied, chunks in the source).
+    Errors (e.g. an unreadable source) propagate to the caller.
+    """
+    client = chromadb.PersistentClient(path=str(path))
+    try:
+        return copy_collection(client.get_collection(SOURCE_COLLECTION), video_id, batch_size)
+    finally:
+        # One source at a time: tens of thousands of open systems would
+        # exhaust file descriptors.
+        release_chroma_system(path)
+
+def copy_collection(source, video_id: str, batch_size: int) -> tuple:
+    expected = source.count()
+    copied = 0
+    with checkout_shared_vectorstore(video_id) as target_store:
+        target = target_store._collection
+        while True:
+            batch = source.get(
+                include=["embeddings", "documents", "metadatas"],
+                limit=batch_size,
+                offset=copied,
+            )
+            ids = batch["ids"]
+            if not ids:
+                break
+
+            metadatas = [
+                {**(metadata or {}), "video_id": video_id}
+                for metadata in batch["metadatas"]
+            ]
+            target.upsert(
+                ids=ids,
+                embeddings=batch["embeddings"],
+                documents=batch["documents"],
+                metadatas=metadatas,
+            )
+            copied += len(ids)
+
+    return copied, expected
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--remove-source",
+        action="store_true",
+        help="Delete each video_* directory once its vectors are copied",
+    )
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    videos = chunks = 0
+    failed = []
+
+    for video_id, path in iter_video_dirs(settings.CHROMA_DIR):
+        try:
+            copied, expected = migrate_video(video_id, path, args.batch_size)
+        except Exception as e:
+            failed.append(video_id)
+            print(f"{video_id}: FAILED ({e}); source kept")
+            continue
+
+        videos += 1
+        chunks += copied
+        if copied != expected:
+            failed.append(video_id)
+            print(f"{video_id}: copied {copied} of {expected} chunks; source kept")
+            continue
+        print(f"{video_id}: {copied} chunks")
+
+        # Only a complete copy makes the source redundant.
+        if args.remove_source:
+            shutil.rmtree(path)
+
+    print(f"Migrated {chunks} chunks from {videos} videos")
+    if failed:
+        print(f"{len(failed)} videos failed: {', '.join(failed)}")
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Rebuilds the vector stores of ingested videos after a change to CHUNK_SIZE,
+CHUNK_OVERLAP or the embedding model.
+
+Videos come from `youtube_ingestions`. Transcripts are read from the
+transcript cache (fetched only when missing) and chunked in a process pool;
+the chunk sets are written by a bounded thread pool, with at most
+--embed-workers embedding requests in flight across all videos. Progress is
+saved under DATA_DIR, so an interrupted run resumes where it stopped.
+
+    python -m app.tools.reindex [--dry-run] [--full] [--restart]
+"""
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import List, Optional, Tuple
+import argparse
+import json
+import os
+import time
+
+from langchain_core.documents import Document
+
+from app.core.config import get_settings
+from app.db.user_db import SessionLocal
+from app.db.vectorstore import checkout_vectorstore, video_store_root
+from app.models.ingested_data import YouTubeIngestion
+from app.services.chunker import SegmentChunker
+from app.services.ingest import (
+    fetch_video_metadata,
+    ingest_lock_path,
+    resolve_transcript,
+    store_chunks,
+    video_chunk_metadata,
+)
+from app.services.singleflight import file_lock
+
+# Per-chunk keys that must not be copied from an old chunk onto new ones.
+CHUNK_KEYS = {"start", "end", "start_index", "staged"}
+
+def config_fingerprint() -> dict:
+    settings = get_settings()
+    return {
+        "chunk_size": settings.CHUNK_SIZE,
+        "chunk_overlap": settings.CHUNK_OVERLAP,
+        "embedding_model": settings.EMBEDDING_MODEL,
+        "layout": settings.VECTORSTORE_LAYOUT,
+        "backend": settings.VECTORSTORE_BACKEND,
+        "flat_index_dtype": settings.FLAT_INDEX_DTYPE,
+    }
+
+class Progress:
+    def __init__(self, path, fingerprint: dict, restart: bool):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.done = set()
+        self.full = False
+        state = json.loads(path.read_text()) if path.exists() else {}
+        # Fingerprint of the last run, known even with `restart`.
+        self.saved = state.get("fingerprint")
+
+        if not restart and self.saved == fingerprint:
+            self.done = set(state.get("done", []))
+            # A resumed --full run stays full.
+            self.full = state.get("full", False)
+
+    def mark(self, video_id: str):
+        self.done.add(video_id)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({
+            "fingerprint": self.fingerprint,
+            "full": self.full,
+            "done": sorted(self.done),
+        }))
+        os.replace(tmp, self.path)
+
+def list_ingested_videos() -> List[Tuple[str, str]]:
+    db = SessionLocal()
+    try:
+        rows = db.query(YouTubeIngestion.video_id, YouTubeIngestion.language).all()
+        return [(row.video_id, row.language) for row in rows]
+    finally:
+        db.close()
+
+def chunk_video(video_id: str, chunk_size: int, chunk_overlap: int):
+    """
+    Process-pool worker: returns (video_id, language, source, [(text, metadata)]).
+    """
+    segments, language, source = resolve_transcript(video_id)
+    chunker = SegmentChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = [
+        (doc.page_content, doc.metadata)
+        for doc in chunker.split(segments, {"source": "youtube", "video_id": video_id})
+    ]
+    return video_id, language, source, chunks
+
+def video_metadata(video_id: str, language: str, source: str) -> dict:
+    """
+    Video-level metadata, copied from an existing chunk when there is one.
+    """
+    with checkout_vectorstore(video_id) as store:
+        existing = store.get(
+            where={"video_id": video_id},
+            limit=1,
+            include=["metadatas"],
+        )
+    if existing["metadatas"]:
+        return {
+            key: value for key, value in existing["metadatas"][0].items()
+            if key not in CHUNK_KEYS
+        }
+
+    metadata = fetch_video_metadata(video_id=video_id, api_key=os.getenv("YOUTUBE_API_KEY"))
+    return video_chunk_metadata(video_id, metadata, language, source)
+
+def write_video(
+    video_id: str,
+    language: str,
+    source: str,
+    chunks,
+    incremental: bool,
+    embed_pool: Optional[Executor] = None,
+) -> int:
+    """
+    Writes a video's new chunk set under its ingest lock. A failed write
+    leaves the video's old store in place.
+    """
+    with file_lock(ingest_lock_path(video_id, language)):
+        metadata = video_metadata(video_id, language, source)
+        documents = [
+            Document(page_content=text, metadata={**metadata, **chunk_metadata})
+            for text, chunk_metadata in chunks
+        ]
+        store_chunks(video_id, documents, incremental=incremental, executor=embed_pool)
+    return len(documents)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="Chunk only; write nothing")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Rebuild every store (implied when the embedding model changed since the last run; per-video layout only)",
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore saved progress")
+    parser.add_argument("--chunk-workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument(
+        "--embed-workers",
+        type=int,
+        default=4,
+        help="Embedding requests in flight across all videos",
+    )
+    args = parser.parse_args(argv)
+
+    settings = get_settings()
+    progress = Progress(
+        settings.DATA_DIR / "reindex_progress.json",
+        config_fingerprint(),
+        restart=args.restart or args.dry_run,
+    )
+    model_changed = (
+        progress.saved is not None
+        and progress.saved.get("embedding_model") != settings.EMBEDDING_MODEL
+    )
+    # Old vectors may have another dimension; only a rebuilt store takes the new ones.
+    full = args.full or progress.full or model_changed
+    if full and video_store_root() is None:
+        # Shard collections hold many videos and keep their embedding dimension.
+        parser.error(
+            "the shared layout cannot be rebuilt per video; reindex with the "
+            "per_video layout, then migrate with app.tools.migrate_vectorstore"
+        )
+    if full and not (args.full or progress.full):
+        print(f"Embedding model changed from {progress.saved.get('embedding_model')}; reindexing with --full")
+    progress.full = args.full = full
+    videos = [video for video in list_ingested_videos() if video[0] not in progress.done]
+    print(f"{len(videos)} videos to reindex ({len(progress.done)} already done)")
+
+    started = time.perf_counter()
+    completed = failed = total_chunks = 0
+    queue = iter(videos)
+    max_in_flight = args.chunk_workers * 2 + args.embed_workers
+
+    def report():
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        print(
+            f"  {completed}/{len(videos)} videos, {failed} failed, {total_chunks} chunks "
+            f"({completed / elapsed:.2f} videos/s, {total_chunks / elapsed:.1f} chunks/s)"
+        )
+
+    with ProcessPoolExecutor(max_workers=args.chunk_workers) as chunk_pool, \
+            ThreadPoolExecutor(max_workers=args.embed_workers) as write_pool, \
+            ThreadPoolExecutor(max_workers=args.embed_workers, thread_name_prefix="reindex-embed") as embed_pool:
+        chunking, writing = {}, {}
+
+        def fill():
+            while len(chunking) + len(writing) < max_in_flight:
+                video = next(queue, None)
+                if video is None:
+                    return
+                future = chunk_pool.submit(
+                    chunk_video, video[0], settings.CHUNK_SIZE, settings.CHUNK_OVERLAP
+                )
+                chunking[future] = video[0]
+
+        fill()
+        while chunking or writing:
+            done, _ = wait(set(chunking) | set(writing), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in chunking:
+                    video_id = chunking.pop(future)
+                    try:
+                        _, language, source, chunks = future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"{video_id}: chunking failed: {e}")
+                        continue
+
+                    if args.dry_run:
+                        completed += 1
+                        total_chunks += len(chunks)
+                        print(f"{video_id}: {len(chunks)} chunks (dry run)")
+                        continue
+
+                    writing[write_pool.submit(
+                        write_video, video_id, language, source, chunks, not args.full, embed_pool
+                    )] = video_id
+                else:
+                    video_id = writing.pop(future)
+                    try:
+                        total_chunks += future.result()
+                    except Exception as e:
+                        failed += 1
+                        print(f"{video_id}: write failed: {e}")
+                        continue
+
+                    completed += 1
+                    progress.mark(video_id)
+                    if completed % 10 == 0:
+                        report()
+            fill()
+
+    report()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Microbenchmark of per-request chat setup: building the retriever, the Cohere
+rerank client and the composed chain for every request (the previous
+behaviour) versus reusing the shared chain from `get_chain()`.
+
+No network calls are made; only object construction is timed.
+
+    python -m benchmarks.chain_setup [--iterations 200]
+"""
+from statistics import median
+import argparse
+import os
+import time
+
+os.environ.setdefault("COHERE_API_KEY", "benchmark")
+os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "benchmark")
+
+def per_request_setup(video_id: str, question: str):
+    from langchain_classic.retrievers import ContextualCompressionRetriever
+    from langchain_cohere import CohereRerank
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_core.runnables import RunnablePassthrough
+
+    from app.db.vectorstore import checkout_vectorstore, video_filter
+    from app.services.rag import build_prompt, get_model
+
+    # Only the chain construction is measured; it is never invoked.
+    with checkout_vectorstore(video_id) as store:
+        base_retriever = store.as_retriever(
+            search_type="mmr",
+            search_kwargs={"k": 10, "lambda_mult": 0.4, "fetch_k": 20, "filter": video_filter(video_id)},
+        )
+    retriever = ContextualCompressionRetriever(
+        base_compressor=CohereRerank(model="rerank-english-v3.0", top_n=4),
+        base_retriever=base_retriever,
+    )
+    return {
+        "context": lambda _: retriever.invoke(question),
+        "question": RunnablePassthrough(),
+    } | build_prompt() | get_model() | StrOutputParser()
+
+def shared_setup(video_id: str, question: str):
+    from app.services.rag import get_chain
+    return get_chain(), {"video_id": video_id, "question": question}
+
+def measure(fn, iterations: int):
+    fn("warmup", "warmup")
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(f"video{i % 8}", f"question {i}")
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    for name, fn in (("per-request", per_request_setup), ("shared", shared_setup)):
+        samples = measure(fn, args.iterations)
+        print(f"{name:<12} p50={median(samples):9.1f}us max={max(samples):9.1f}us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Peak memory and time of transcript chunking + hashing for a long synthetic
+transcript: the previous join + RecursiveCharacterTextSplitter path versus the
+streaming SegmentChunker.
+
+    python -m benchmarks.chunker_memory [--hours 3]
+"""
+from types import SimpleNamespace
+import argparse
+import random
+import time
+import tracemalloc
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.services.chunker import SegmentChunker, hash_segments
+from app.services.ingest import hash_text, normalize_text
+
+WORDS = "the a model data we so this function value next because training loss layer".split()
+
+def synthetic_segments(hours: float, seed: int = 0):
+    rng = random.Random(seed)
+    segments, start = [], 0.0
+    while start < hours * 3600:
+        duration = rng.uniform(1.5, 4.5)
+        text = " ".join(rng.choices(WORDS, k=rng.randint(4, 14)))
+        segments.append(SimpleNamespace(text=text, start=start, duration=duration))
+        start += duration
+    return segments
+
+def joined_path(segments, chunk_size, chunk_overlap):
+    transcript = " ".join(x.text for x in segments)
+    transcript_hash = hash_text(normalize_text(transcript))
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunks = splitter.split_documents([Document(page_content=transcript, metadata={"video_id": "v"})])
+    return transcript_hash, len(chunks)
+
+def streaming_path(segments, chunk_size, chunk_overlap):
+    transcript_hash = hash_segments(segments)
+    chunker = SegmentChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    count = sum(1 for _ in chunker.split(segments, {"video_id": "v"}))
+    return transcript_hash, count
+
+def measure(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--hours", type=float, default=3.0)
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=180)
+    args = parser.parse_args(argv)
+
+    segments = synthetic_segments(args.hours)
+    print(f"{len(segments)} segments ({args.hours}h)")
+
+    hashes = set()
+    for name, fn in (("joined", joined_path), ("streaming", streaming_path)):
+        (transcript_hash, chunks), peak, elapsed = measure(
+            fn, segments, args.chunk_size, args.chunk_overlap
+        )
+        hashes.add(transcript_hash)
+        print(f"{name:<10} chunks={chunks:<6} peak={peak / 1024:10.1f}KiB time={elapsed * 1000:8.1f}ms")
+
+    print("transcript hashes match" if len(hashes) == 1 else "transcript hashes DIFFER")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+"""
+End-to-end benchmark of the real FastAPI app with local fakes for YouTube,
+embeddings, reranking and the LLM (see `benchmarks.fakes`).
+
+The app is served by uvicorn on a local port and driven over HTTP through
+`/ingest/youtube` and `/chat` at each concurrency level. Reports ingest
+chunks/s and latency percentiles, and chat time-to-first-token and tokens/s,
+then writes the results as JSON (optionally compared against a baseline).
+
+All state lives in a temporary data directory, removed afterwards.
+
+    python -m benchmarks.e2e [--concurrency 1 4 16] [--output results.json] [--baseline old.json]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from statistics import median
+from typing import List, Optional
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import uuid
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+def configure_environment(data_dir: Path) -> None:
+    # Must run before the app is imported: settings are read at import time.
+    os.environ.update({
+        "DATA_DIR": str(data_dir),
+        "CHROMA_DIR": str(data_dir / "chroma"),
+        "USER_DB": f"sqlite:///{data_dir / 'user.db'}",
+        "CHAT_DB": f"sqlite:///{data_dir / 'chat_history.db'}",
+        "ANSWER_CACHE_ENABLED": "false",
+        "PREWARM_ON_STARTUP": "false",
+    })
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    os.environ.setdefault("COHERE_API_KEY", "benchmark")
+    os.environ.setdefault("HUGGINGFACEHUB_API_TOKEN", "benchmark")
+
+def start_server(app):
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False)
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("benchmark server failed to start")
+        time.sleep(0.05)
+    return server, thread, port
+
+class Client:
+    def __init__(self, port: int, token: Optional[str] = None):
+        self.port = port
+        self.token = token
+
+    def _request(self, method: str, path: str, body: dict):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=600)
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        conn.request(method, path, body=json.dumps(body), headers=headers)
+        return conn, conn.getresponse()
+
+    def post_json(self, path: str, body: dict) -> dict:
+        conn, response = self._request("POST", path, body)
+        try:
+            payload = json.loads(response.read() or b"null")
+            if response.status >= 400:
+                raise RuntimeError(f"POST {path} -> {response.status}: {payload}")
+            return payload
+        finally:
+            conn.close()
+
+    def stream_events(self, path: str, body: dict):
+        conn, response = self._request("POST", path, body)
+        try:
+            if response.status >= 400:
+                raise RuntimeError(f"POST {path} -> {response.status}: {response.read()!r}")
+            while True:
+                line = response.readline()
+                if not line:
+                    return
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        finally:
+            conn.close()
+
+def login(port: int) -> str:
+    client = Client(port)
+    credentials = {"username": "bench_user", "password": "Benchmark1!"}
+    client.post_json("/auth/signup", {**credentials, "email": "bench@example.com"})
+    return client.post_json("/auth/login", credentials)["access_token"]
+
+def run_level(concurrency: int, requests: int, fn) -> tuple:
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(fn, range(requests)))
+    return samples, time.perf_counter() - started
+
+def bench_ingest(client: Client, concurrency: int, requests: int, run_id: str) -> dict:
+    def ingest(i: int) -> dict:
+        start = time.perf_counter()
+        result = client.post_json(
+            "/ingest/youtube",
+            {"video_id": f"bench-{run_id}-c{concurrency}-{i}"},
+        )
+        return {"seconds": time.perf_counter() - start, "chunks": result["chunks_added"]}
+
+    samples, wall = run_level(concurrency, requests, ingest)
+    latencies = [sample["seconds"] * 1000 for sample in samples]
+    chunks = sum(sample["chunks"] for sample in samples)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "chunks": chunks,
+        "chunks_per_second": chunks / wall,
+        "latency_ms_p50": median(latencies),
+        "latency_ms_p99": percentile(latencies, 0.99),
+    }
+
+def bench_chat(client: Client, concurrency: int, requests: int, video_ids: List[str]) -> dict:
+    def chat(i: int) -> dict:
+        start = time.perf_counter()
+        first = None
+        tokens = 0
+        for event in client.stream_events(
+            "/chat",
+            {"video_id": video_ids[i % len(video_ids)], "question": f"how is the attention cache used {i}?"},
+        ):
+            if event["event"] == "message":
+                first = first or time.perf_counter()
+                tokens += 1
+            elif event["event"] == "error":
+                raise RuntimeError(event["data"])
+        end = time.perf_counter()
+        return {
+            "ttft": (first or end) - start,
+            "seconds": end - start,
+            "tokens_per_second": tokens / (end - first) if first and end > first else 0.0,
+            "tokens": tokens,
+        }
+
+    samples, wall = run_level(concurrency, requests, chat)
+    ttft = [sample["ttft"] * 1000 for sample in samples]
+    latencies = [sample["seconds"] * 1000 for sample in samples]
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "ttft_ms_p50": median(ttft),
+        "ttft_ms_p99": percentile(ttft, 0.99),
+        "latency_ms_p50": median(latencies),
+        "latency_ms_p99": percentile(latencies, 0.99),
+        "tokens_per_second_p50": median(sample["tokens_per_second"] for sample in samples),
+        "total_tokens_per_second": sum(sample["tokens"] for sample in samples) / wall,
+    }
+
+def compare(results: dict, baseline: dict) -> None:
+    print("\nvs baseline:")
+    for section in ("ingest", "chat"):
+        previous = {row["concurrency"]: row for row in baseline.get(section, [])}
+        for row in results[section]:
+            old = previous.get(row["concurrency"])
+            if not old:
+                continue
+            changes = [
+                f"{key} {100 * (row[key] - old[key]) / old[key]:+.1f}%"
+                for key in row
+                if key not in ("concurrency", "requests", "chunks")
+                and isinstance(old.get(key), (int, float)) and old[key]
+            ]
+            print(f"  {section:<6} c={row['concurrency']:<3} " + ", ".join(changes))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--ingest-requests", type=int, default=16)
+    parser.add_argument("--chat-requests", type=int, default=32)
+    parser.add_argument("--segments", type=int, default=600, help="Transcript segments per video")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0)
+    parser.add_argument("--llm-tokens", type=int, default=64)
+    parser.add_argument("--token-latency-ms", type=float, default=10.0)
+    parser.add_argument("--first-token-latency-ms", type=float, default=50.0)
+    parser.add_argument("--output", type=Path, default=Path("benchmark-e2e.json"))
+    parser.add_argument("--baseline", type=Path, help="Earlier results to compare against")
+    args = parser.parse_args(argv)
+
+    data_dir = Path(tempfile.mkdtemp(prefix="rag-bench-"))
+    configure_environment(data_dir)
+
+    from app.main import app
+    from benchmarks import fakes
+
+    fakes.install(
+        transcript_segments=args.segments,
+        embedding_latency_seconds=args.embedding_latency_ms / 1000,
+        llm_tokens=args.llm_tokens,
+        token_latency_seconds=args.token_latency_ms / 1000,
+        first_token_latency_seconds=args.first_token_latency_ms / 1000,
+    )
+
+    server, thread, port = start_server(app)
+    try:
+        client = Client(port, login(port))
+        run_id = uuid.uuid4().hex[:8]
+
+        results = {
+            "config": {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()},
+            "ingest": [],
+            "chat": [],
+        }
+        for concurrency in args.concurrency:
+            row = bench_ingest(client, concurrency, args.ingest_requests, run_id)
+            results["ingest"].append(row)
+            print(
+                f"ingest c={concurrency:<3} {row['chunks_per_second']:8.1f} chunks/s "
+                f"p50={row['latency_ms_p50']:8.1f}ms p99={row['latency_ms_p99']:8.1f}ms"
+            )
+
+        video_ids = [f"bench-{run_id}-c{args.concurrency[0]}-{i}" for i in range(args.ingest_requests)]
+        for concurrency in args.concurrency:
+            row = bench_chat(client, concurrency, args.chat_requests, video_ids)
+            results["chat"].append(row)
+            print(
+                f"chat   c={concurrency:<3} ttft p50={row['ttft_ms_p50']:8.1f}ms p99={row['ttft_ms_p99']:8.1f}ms "
+                f"{row['tokens_per_second_p50']:7.1f} tok/s/stream {row['total_tokens_per_second']:8.1f} tok/s total"
+            )
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f"\nresults written to {args.output}")
+
+    if args.baseline:
+        compare(results, json.loads(args.baseline.read_text()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Deterministic local stand-ins for the external services on the hot paths
+(YouTube, Cohere embed/rerank, HF inference), for benchmarks only.
+
+`install()` patches them into the app's lazily initialized singletons; call
+it after configuring the environment and before serving requests.
+"""
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Iterator, List, Optional, Sequence
+import asyncio
+import hashlib
+import random
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.documents.compressor import BaseDocumentCompressor
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.db.lexical_index import tokenize
+
+WORDS = (
+    "model training data loss gradient layer attention token vector index query "
+    "latency cache shard batch stream memory network request server client video "
+    "transcript chunk embedding rerank context answer question python service"
+).split()
+
+class FakeTranscriptProvider:
+    """
+    Generates the same transcript for the same video id: `segments` segments
+    of 8-16 words, two seconds apart.
+    """
+
+    def __init__(self, segments: int = 600, latency_seconds: float = 0.0):
+        self.segments = segments
+        self.latency_seconds = latency_seconds
+
+    def __call__(self, video_id: str):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+        rng = random.Random(video_id)
+        segments = [
+            SimpleNamespace(
+                text=" ".join(rng.choices(WORDS, k=rng.randint(8, 16))) + ".",
+                start=i * 2.0,
+                duration=1.9,
+            )
+            for i in range(self.segments)
+        ]
+        return segments, "en", "manual"
+
+def fake_video_metadata(video_id: str, api_key: Optional[str]) -> dict:
+    return {
+        "title": f"Benchmark video {video_id}",
+        "description": "Synthetic transcript for benchmarks.",
+        "channel_name": "benchmarks",
+        "published_at": "2024-01-01T00:00:00Z",
+        "tags": ["benchmark"],
+        "duration": "PT20M",
+    }
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature-hashed bag of words, L2-normalized; texts sharing words get
+    similar vectors, so MMR and filtering behave realistically.
+    """
+
+    def __init__(self, size: int = 256, latency_seconds: float = 0.0):
+        self.size = size
+        self.latency_seconds = latency_seconds
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for token in tokenize(text):
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.size
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+class PassthroughReranker(BaseDocumentCompressor):
+    top_n: int = 4
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks=None,
+    ) -> Sequence[Document]:
+        return list(documents)[: self.top_n]
+
+class FakeStreamingChatModel(BaseChatModel):
+    """
+    Streams `tokens` words, waiting `token_latency_seconds` before each one
+    (after `first_token_latency_seconds` for the first).
+    """
+
+    tokens: int = 64
+    token_latency_seconds: float = 0.01
+    first_token_latency_seconds: float = 0.05
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def _words(self) -> List[str]:
+        return [f"{WORDS[i % len(WORDS)]} " for i in range(self.tokens)]
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._words())))])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for i, word in enumerate(self._words()):
+            time.sleep(self.first_token_latency_seconds if i == 0 else self.token_latency_seconds)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        for i, word in enumerate(self._words()):
+            await asyncio.sleep(self.first_token_latency_seconds if i == 0 else self.token_latency_seconds)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+
+def install(
+    transcript_segments: int = 600,
+    transcript_latency_seconds: float = 0.0,
+    embedding_latency_seconds: float = 0.0,
+    llm_tokens: int = 64,
+    token_latency_seconds: float = 0.01,
+    first_token_latency_seconds: float = 0.05,
+) -> None:
+    import app.db.vectorstore as vectorstore
+    import app.services.ingest as ingest
+    import app.services.rag as rag
+    import app.services.rerankers as rerankers
+
+    ingest.fetch_transcript = FakeTranscriptProvider(transcript_segments, transcript_latency_seconds)
+    ingest.fetch_video_metadata = fake_video_metadata
+    vectorstore._embeddings = HashingEmbeddings(latency_seconds=embedding_latency_seconds)
+    rerankers._reranker = PassthroughReranker(top_n=rerankers.get_settings().RERANK_TOP_N)
+    rerankers._reranker_loaded = True
+    rag._model = FakeStreamingChatModel(
+        tokens=llm_tokens,
+        token_latency_seconds=token_latency_seconds,
+        first_token_latency_seconds=first_token_latency_seconds,
+    )
+    rag._chain = None
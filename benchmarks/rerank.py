@@ -0,0 +1,94 @@
+"""
+Compares the in-process reranker against the Cohere rerank API.
+
+Offline (synthetic candidates, local reranker latency only):
+
+    python -m benchmarks.rerank
+
+Against an ingested video, with Cohere as the quality reference
+(needs COHERE_API_KEY):
+
+    python -m benchmarks.rerank --video-id <id> --questions questions.txt
+"""
+from statistics import median
+import argparse
+import random
+import time
+
+from langchain_core.documents import Document
+
+from app.services.rerankers import LocalReranker, build_reranker
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def synthetic_candidates(rng: random.Random, count: int, words: int):
+    vocab = [f"term{i}" for i in range(2000)]
+    return [
+        Document(page_content=" ".join(rng.choices(vocab, k=words)), metadata={"i": i})
+        for i in range(count)
+    ]
+
+def run_synthetic(args):
+    rng = random.Random(0)
+    reranker = LocalReranker(top_n=args.top_n)
+    latencies = []
+    for _ in range(args.iterations):
+        docs = synthetic_candidates(rng, args.candidates, words=140)
+        query = " ".join(rng.choice(docs).page_content.split()[:8])
+        _, ms = timed(reranker.compress_documents, docs, query)
+        latencies.append(ms)
+
+    print(f"local  p50={median(latencies):.3f}ms p99={percentile(latencies, 0.99):.3f}ms")
+
+def run_live(args):
+    from app.db.vectorstore import checkout_vectorstore, video_filter
+
+    local = LocalReranker(top_n=args.top_n)
+    cohere = build_reranker("cohere", args.top_n)
+
+    with open(args.questions) as handle:
+        questions = [line.strip() for line in handle if line.strip()]
+
+    local_ms, cohere_ms, overlap = [], [], []
+    for question in questions:
+        with checkout_vectorstore(args.video_id) as store:
+            docs = store.max_marginal_relevance_search(
+                question, k=args.candidates, fetch_k=2 * args.candidates,
+                lambda_mult=0.4, filter=video_filter(args.video_id),
+            )
+        local_docs, ms = timed(local.compress_documents, docs, question)
+        local_ms.append(ms)
+        cohere_docs, ms = timed(cohere.compress_documents, docs, question)
+        cohere_ms.append(ms)
+
+        local_top = {doc.page_content for doc in local_docs}
+        cohere_top = {doc.page_content for doc in cohere_docs}
+        overlap.append(len(local_top & cohere_top) / max(1, len(cohere_top)))
+
+    for name, values in (("local", local_ms), ("cohere", cohere_ms)):
+        print(f"{name:<6} p50={median(values):.3f}ms p99={percentile(values, 0.99):.3f}ms")
+    print(f"top-{args.top_n} overlap with cohere: {sum(overlap) / len(overlap):.2%}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--video-id")
+    parser.add_argument("--questions")
+    parser.add_argument("--candidates", type=int, default=10)
+    parser.add_argument("--top-n", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if args.video_id and args.questions:
+        run_live(args)
+    else:
+        run_synthetic(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Start-up budget check for the API process: times `import app.main` in a fresh
+interpreter and verifies that none of the heavy client libraries (LLM,
+reranker/embeddings, Chroma, transcript API) are loaded by it, nor by running
+the app's startup (lifespan) hooks.
+
+Exits non-zero when the budget is exceeded, so it can gate CI.
+
+    python -m benchmarks.startup_budget [--budget-seconds 2.0] [--runs 3]
+"""
+from statistics import median
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BUDGET_SECONDS = 2.0
+
+# Top-level packages that must only be imported on first use (or by warm-up).
+LAZY_MODULES = (
+    "torch",
+    "sentence_transformers",
+    "langchain_huggingface",
+    "huggingface_hub",
+    "langchain_cohere",
+    "cohere",
+    "langchain_classic",
+    "langchain_community",
+    "langchain_chroma",
+    "chromadb",
+    "youtube_transcript_api",
+)
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "modules": sorted({name.split(".")[0] for name in sys.modules}),
+}))
+"""
+
+# Import the app and run its startup and shutdown hooks, as a server would.
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+from fastapi.testclient import TestClient
+import app.main
+with TestClient(app.main.app):
+    elapsed = time.perf_counter() - start
+    modules = sorted({name.split(".")[0] for name in sys.modules})
+print(json.dumps({"seconds": elapsed, "modules": modules}))
+"""
+
+def probe(script: str = PROBE) -> dict:
+    env = {
+        "JWT_SECRET_KEY": "benchmark",
+        "COHERE_API_KEY": "benchmark",
+        "HUGGINGFACEHUB_API_TOKEN": "benchmark",
+        **os.environ,
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-seconds", type=float, default=BUDGET_SECONDS)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    # The first run also warms the bytecode cache; it is not counted.
+    probe()
+    runs = [probe() for _ in range(max(1, args.runs))]
+    seconds = median(run["seconds"] for run in runs)
+    started = probe(STARTUP_PROBE)
+    loaded = sorted(set(LAZY_MODULES) & (set(runs[-1]["modules"]) | set(started["modules"])))
+
+    print(f"import app.main: p50={seconds:.3f}s (budget {args.budget_seconds:.3f}s)")
+    print(f"import and startup hooks: {started['seconds']:.3f}s")
+    print(f"eagerly loaded heavy modules: {', '.join(loaded) or 'none'}")
+
+    failures = []
+    if seconds > args.budget_seconds:
+        failures.append(f"import took {seconds:.3f}s, budget is {args.budget_seconds:.3f}s")
+    if loaded:
+        failures.append(f"heavy modules imported at start-up: {', '.join(loaded)}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
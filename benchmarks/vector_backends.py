@@ -0,0 +1,144 @@
+"""
+Compares the Chroma and flat (memory-mapped NumPy) vector store backends on
+per-video corpora of synthetic chunks.
+
+For each backend, videos are written through the same helpers ingestion
+uses, then every video is opened cold and queried: reports write time,
+open + first query latency, warm similarity/MMR latency, disk usage and,
+for quantized flat indexes, recall@k against exact float32 search.
+
+    python -m benchmarks.vector_backends [--videos 20] [--chunks 200] [--dim 1024]
+"""
+from pathlib import Path
+from statistics import median
+from typing import Dict, List
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from app.db.vectorstore import add_embedded_chunks, video_filter
+from benchmarks.fakes import WORDS, HashingEmbeddings
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+def disk_bytes(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+def make_video(video_id: str, chunks: int, embeddings: HashingEmbeddings):
+    rng = random.Random(video_id)
+    texts = [" ".join(rng.choices(WORDS, k=rng.randint(60, 120))) for _ in range(chunks)]
+    docs = [
+        Document(page_content=text, metadata={"video_id": video_id, "start": i * 30.0, "staged": False})
+        for i, text in enumerate(texts)
+    ]
+    ids = [f"{video_id}:{i}" for i in range(chunks)]
+    return ids, docs, embeddings.embed_documents(texts)
+
+def open_store(backend: str, root: Path, video_id: str, embeddings, dtype: str = "float32"):
+    if backend == "chroma":
+        from langchain_chroma import Chroma
+        return Chroma(persist_directory=str(root / f"video_{video_id}"), embedding_function=embeddings)
+
+    from app.db.flat_index import FlatCollection, FlatVectorStore
+    return FlatVectorStore(FlatCollection(root / f"video_{video_id}", dtype=dtype), embeddings)
+
+def run_backend(name: str, backend: str, dtype: str, corpus, queries, args, root: Path) -> Dict:
+    embeddings = HashingEmbeddings(size=args.dim)
+    path = root / name
+
+    start = time.perf_counter()
+    for video_id, (ids, docs, vectors) in corpus.items():
+        store = open_store(backend, path, video_id, embeddings, dtype)
+        add_embedded_chunks(store, ids, docs, vectors)
+    write_seconds = time.perf_counter() - start
+
+    open_ms: List[float] = []
+    search_ms: List[float] = []
+    mmr_ms: List[float] = []
+    results: Dict[str, List[List[str]]] = {}
+    for video_id in corpus:
+        start = time.perf_counter()
+        store = open_store(backend, path, video_id, embeddings, dtype)
+        store.similarity_search_by_vector_with_relevance_scores(queries[0], k=args.k, filter=video_filter(video_id))
+        open_ms.append((time.perf_counter() - start) * 1000)
+
+        results[video_id] = []
+        for query in queries:
+            start = time.perf_counter()
+            found = store.similarity_search_by_vector_with_relevance_scores(
+                query, k=args.k, filter=video_filter(video_id)
+            )
+            search_ms.append((time.perf_counter() - start) * 1000)
+            results[video_id].append([doc.id for doc, _ in found])
+
+            start = time.perf_counter()
+            store.max_marginal_relevance_search_by_vector(
+                query, k=args.k, fetch_k=2 * args.k, lambda_mult=0.4, filter=video_filter(video_id)
+            )
+            mmr_ms.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "write_seconds": write_seconds,
+        "open_ms_p50": median(open_ms),
+        "search_ms_p50": median(search_ms),
+        "search_ms_p99": percentile(search_ms, 0.99),
+        "mmr_ms_p50": median(mmr_ms),
+        "disk_mb": disk_bytes(path) / 1e6,
+        "results": results,
+    }
+
+def recall(results: Dict, reference: Dict) -> float:
+    hits = total = 0
+    for video_id, rankings in reference.items():
+        for expected, found in zip(rankings, results[video_id]):
+            hits += len(set(expected) & set(found))
+            total += len(expected)
+    return hits / total if total else 1.0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--chunks", type=int, default=200, help="Chunks per video")
+    parser.add_argument("--dim", type=int, default=1024, help="Embedding dimensions")
+    parser.add_argument("--queries", type=int, default=20, help="Queries per video")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--skip-chroma", action="store_true")
+    args = parser.parse_args(argv)
+
+    embeddings = HashingEmbeddings(size=args.dim)
+    corpus = {f"bench{i}": make_video(f"bench{i}", args.chunks, embeddings) for i in range(args.videos)}
+    rng = random.Random(0)
+    queries = [
+        np.asarray(embeddings.embed_query(" ".join(rng.choices(WORDS, k=6))), dtype=np.float32).tolist()
+        for _ in range(args.queries)
+    ]
+
+    backends = [("flat-float32", "flat", "float32"), ("flat-float16", "flat", "float16"), ("flat-int8", "flat", "int8")]
+    if not args.skip_chroma:
+        backends.insert(0, ("chroma", "chroma", "float32"))
+
+    root = Path(tempfile.mkdtemp(prefix="rag-vector-bench-"))
+    try:
+        rows = {name: run_backend(name, backend, dtype, corpus, queries, args, root) for name, backend, dtype in backends}
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    reference = rows["flat-float32"]["results"]
+    print(f"{args.videos} videos x {args.chunks} chunks, dim={args.dim}, k={args.k}\n")
+    print(f"{'backend':<14}{'write s':>9}{'open ms':>10}{'search p50':>12}{'search p99':>12}{'mmr p50':>10}{'disk MB':>10}{'recall':>8}")
+    for name, row in rows.items():
+        print(
+            f"{name:<14}{row['write_seconds']:9.2f}{row['open_ms_p50']:10.2f}{row['search_ms_p50']:12.3f}"
+            f"{row['search_ms_p99']:12.3f}{row['mmr_ms_p50']:10.3f}{row['disk_mb']:10.2f}"
+            f"{recall(row['results'], reference):8.3f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Test configuration. Settings are read when the app is imported, so the
+environment points everything at a throwaway data directory first.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+
+_DATA_DIR = tempfile.mkdtemp(prefix="rag-tests-")
+os.environ.update({
+    "DATA_DIR": _DATA_DIR,
+    "CHROMA_DIR": os.path.join(_DATA_DIR, "chroma"),
+    "USER_DB": f"sqlite:///{os.path.join(_DATA_DIR, 'user.db')}",
+    "CHAT_DB": f"sqlite:///{os.path.join(_DATA_DIR, 'chat_history.db')}",
+    "JWT_SECRET_KEY": "tests",
+    "COHERE_API_KEY": "tests",
+    "HUGGINGFACEHUB_API_TOKEN": "tests",
+    "ANSWER_CACHE_ENABLED": "false",
+    "PREWARM_ON_STARTUP": "false",
+})
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
+
+class StubServer:
+    """
+    Local HTTP server whose responses are scripted per path. Each entry of
+    `routes[path]` is (status, body, delay seconds); entries are consumed in
+    order and the last one repeats. Every request is logged with its start
+    and end times.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                started = time.perf_counter()
+                path = self.path.split("?", 1)[0]
+                with stub._lock:
+                    script = stub.routes.get(path) or [(404, {}, 0.0)]
+                    status, body, delay = script.pop(0) if len(script) > 1 else script[0]
+                time.sleep(delay)
+                payload = json.dumps(body).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                with stub._lock:
+                    stub.requests.append((path, started, time.perf_counter()))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def hits(self, path: str) -> int:
+        with self._lock:
+            return sum(1 for p, _, _ in self.requests if p == path)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
@@ -0,0 +1,64 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from langchain_core.documents import Document
+
+from app.db.transcript_cache import TranscriptSegment, get_transcript_cache
+from app.services.chunker import SegmentChunker, hash_segments
+from app.services.ingest import hash_text, normalize_text, with_chunk_ids
+from app.tools.reindex import chunk_video
+
+def segments(texts):
+    return [TranscriptSegment(text, i * 2.0, 1.8) for i, text in enumerate(texts)]
+
+def lecture(changed=None):
+    texts = [f"segment {i:03d} talks about vector stores." for i in range(80)]
+    if changed is not None:
+        texts[40] = changed
+    return segments(texts)
+
+def chunked(transcript, video_id="chunker"):
+    chunker = SegmentChunker(chunk_size=200, chunk_overlap=50)
+    return [
+        (chunk_id, chunk.page_content, chunk.metadata)
+        for chunk_id, chunk in with_chunk_ids(video_id, chunker.split(transcript))
+    ]
+
+def test_unrelated_segment_change_keeps_other_chunks():
+    before = chunked(lecture())
+    after = chunked(lecture(changed="segment 040 talks about lexical index."))
+
+    assert [c[2] for c in after] == [c[2] for c in before]
+    changed = [i for i, (old, new) in enumerate(zip(before, after)) if old != new]
+    assert changed and all("segment 040" in before[i][1] for i in changed)
+
+    # A longer segment moves later boundaries, never earlier ones.
+    longer = chunked(lecture(changed="segment 040 " + "talks at length " * 8))
+    first = next(i for i, chunk in enumerate(before) if "segment 040" in chunk[1])
+    assert longer[:first] == before[:first]
+
+def test_streaming_hash_matches_joined_hash():
+    texts = [
+        "  Hello,  World! ", "", "   ", "...", "it's\tnew\nline", " ünïcode ", "end.  ",
+    ]
+    assert hash_segments(segments(texts)) == hash_text(normalize_text(" ".join(texts)))
+
+def test_chunking_pool_matches_in_process():
+    video_ids = ["pool-a", "pool-b"]
+    for i, video_id in enumerate(video_ids):
+        texts = [f"video {i} segment {j} about chunking pools." for j in range(60)]
+        get_transcript_cache().put(video_id, "en", segments(texts), "manual")
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        pooled = list(pool.map(chunk_video, video_ids, [200] * 2, [50] * 2))
+        pooled_hashes = list(pool.map(hash_segments, [lecture(), lecture("changed")]))
+
+    for video_id, _, _, chunks in pooled:
+        in_process = chunk_video(video_id, 200, 50)
+        assert chunks == in_process[3]
+        documents = [Document(page_content=text, metadata=metadata) for text, metadata in chunks]
+        cached = get_transcript_cache().get(video_id, "en").segments
+        assert [chunk_id for chunk_id, _ in with_chunk_ids(video_id, documents)] == [
+            chunk[0] for chunk in chunked(cached, video_id)
+        ]
+
+    assert pooled_hashes == [hash_segments(lecture()), hash_segments(lecture("changed"))]
@@ -0,0 +1,44 @@
+import numpy as np
+
+import app.db.flat_index as flat_index
+from app.db.flat_index import FlatCollection
+
+def write(collection, version: int):
+    collection.upsert(
+        ids=["a", "b"],
+        embeddings=[[float(version), 0.0], [0.0, float(version)]],
+        documents=[f"a{version}", f"b{version}"],
+        metadatas=[{"video_id": "v"}, {"video_id": "v"}],
+    )
+
+def test_previous_generation_survives_next_write(tmp_path):
+    writer = FlatCollection(tmp_path)
+    reader = FlatCollection(tmp_path)
+
+    write(writer, 1)
+    first = set(tmp_path.glob("vectors.*.npy"))
+    write(writer, 2)
+    assert first <= set(tmp_path.glob("vectors.*.npy"))
+
+    write(writer, 3)
+    assert len(list(tmp_path.glob("vectors.*.npy"))) == 2
+    assert reader.get(ids=["a"])["documents"] == ["a3"]
+
+def test_refresh_retries_when_vectors_file_vanishes(tmp_path, monkeypatch):
+    writer = FlatCollection(tmp_path)
+    write(writer, 1)
+
+    load = np.load
+    failures = []
+
+    def flaky_load(*args, **kwargs):
+        if not failures:
+            failures.append(args[0])
+            raise FileNotFoundError(args[0])
+        return load(*args, **kwargs)
+
+    monkeypatch.setattr(flat_index.np, "load", flaky_load)
+    reader = FlatCollection(tmp_path)
+
+    assert failures
+    assert reader.count() == 2
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+import time
+
+import pytest
+import requests
+
+from app.core.config import get_settings
+from app.services.http import build_http_session
+
+VIDEO = {
+    "items": [{
+        "snippet": {
+            "title": "Stub video",
+            "description": "Served by the stub",
+            "channelTitle": "stub",
+            "publishedAt": "2024-01-01T00:00:00Z",
+            "tags": ["stub"],
+        },
+        "contentDetails": {"duration": "PT10M"},
+    }]
+}
+
+@pytest.fixture
+def http_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "HTTP_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(settings, "HTTP_MAX_RETRIES", 3)
+    return settings
+
+def test_requests_time_out(stub_server, http_settings, monkeypatch):
+    monkeypatch.setattr(http_settings, "HTTP_MAX_RETRIES", 0)
+    stub_server.routes["/slow"] = [(200, {}, 1.0)]
+    session = build_http_session(pool_size=2)
+
+    start = time.perf_counter()
+    with pytest.raises(requests.exceptions.RequestException):
+        session.get(f"{stub_server.url}/slow")
+    assert time.perf_counter() - start < 0.8
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_throttling_and_server_errors(stub_server, http_settings, status):
+    stub_server.routes["/flaky"] = [(status, {}, 0.0), (status, {}, 0.0), (200, {"ok": True}, 0.0)]
+    session = build_http_session(pool_size=2)
+
+    response = session.get(f"{stub_server.url}/flaky")
+
+    assert response.status_code == 200
+    assert response.json() == {"ok": True}
+    assert stub_server.hits("/flaky") == 3
+
+def test_gives_up_after_max_retries(stub_server, http_settings, monkeypatch):
+    monkeypatch.setattr(http_settings, "HTTP_MAX_RETRIES", 2)
+    stub_server.routes["/down"] = [(503, {}, 0.0)]
+    session = build_http_session(pool_size=2)
+
+    with pytest.raises(requests.exceptions.RetryError):
+        session.get(f"{stub_server.url}/down")
+    assert stub_server.hits("/down") == 3
+
+def test_client_errors_are_not_retried(stub_server, http_settings):
+    stub_server.routes["/missing"] = [(404, {}, 0.0)]
+    session = build_http_session(pool_size=2)
+
+    assert session.get(f"{stub_server.url}/missing").status_code == 404
+    assert stub_server.hits("/missing") == 1
+
+def test_metadata_is_fetched_while_the_transcript_downloads(stub_server, monkeypatch):
+    import app.db.vectorstore as vectorstore
+    import app.services.ingest as ingest
+    from app.db.user_db import SessionLocal, engine
+    from app.models.user_db import Base
+    from app.services.http import get_thread_http_session
+    from benchmarks.fakes import HashingEmbeddings
+
+    delay = 0.5
+    segments = [[f"stub sentence number {i} about caching.", i * 2.0, 1.8] for i in range(40)]
+    stub_server.routes["/videos"] = [(200, VIDEO, delay)]
+    stub_server.routes["/transcript"] = [(200, {"segments": segments}, delay)]
+    monkeypatch.setattr(get_settings(), "YOUTUBE_API_BASE_URL", stub_server.url)
+
+    def fetch_transcript(video_id):
+        res = get_thread_http_session().get(f"{stub_server.url}/transcript", params={"v": video_id})
+        res.raise_for_status()
+        return [SimpleNamespace(text=t, start=s, duration=d) for t, s, d in res.json()["segments"]], "en", "manual"
+
+    monkeypatch.setattr(ingest, "fetch_transcript", fetch_transcript)
+    monkeypatch.setattr(vectorstore, "_embeddings", HashingEmbeddings())
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        chunks_added = ingest.ingest_youtube("stub-video", db, force=True)
+    finally:
+        db.close()
+
+    assert chunks_added > 0
+    # The two requests were in flight at the same time (sequential fetches
+    # would not overlap), so they cost max(transcript, metadata).
+    windows = {path: (started, ended) for path, started, ended in stub_server.requests}
+    video, transcript = windows["/videos"], windows["/transcript"]
+    assert video[0] < transcript[1] and transcript[0] < video[1]
@@ -0,0 +1,222 @@
+from types import SimpleNamespace
+
+import pytest
+
+import app.db.vectorstore as vectorstore
+import app.services.ingest as ingest
+import app.services.store_eviction as store_eviction
+from app.core.config import get_settings
+from app.db.transcript_cache import get_transcript_cache
+from app.db.user_db import SessionLocal, engine
+from app.models.user_db import Base
+from app.services.answer_cache import get_answer_cache
+from benchmarks.fakes import HashingEmbeddings, fake_video_metadata
+
+class Upstream:
+    """
+    Fake YouTube: serves `text` as the transcript and counts fetches.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.transcript_fetches = 0
+        self.metadata_fetches = 0
+
+    def fetch_transcript(self, video_id):
+        self.transcript_fetches += 1
+        sentences = [s for s in self.text.split(". ") if s]
+        return [SimpleNamespace(text=s + ".", start=i * 2.0, duration=1.8) for i, s in enumerate(sentences)], "en", "manual"
+
+    def fetch_video_metadata(self, video_id, api_key):
+        self.metadata_fetches += 1
+        return fake_video_metadata(video_id, api_key)
+
+@pytest.fixture
+def upstream(monkeypatch):
+    upstream = Upstream(" ".join(f"sentence {i} about caching." for i in range(120)))
+    monkeypatch.setattr(ingest, "fetch_transcript", upstream.fetch_transcript)
+    monkeypatch.setattr(ingest, "fetch_video_metadata", upstream.fetch_video_metadata)
+    monkeypatch.setattr(vectorstore, "_embeddings", HashingEmbeddings())
+    Base.metadata.create_all(bind=engine)
+    return upstream
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+def test_expired_recheck_asks_youtube_and_picks_up_changes(upstream, db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "INGEST_FRESHNESS_SECONDS", 0)
+
+    assert ingest.ingest_youtube("recheck", db) > 0
+    fetches = upstream.transcript_fetches
+
+    # Unchanged upstream: confirmed against YouTube, metadata not refetched.
+    metadata_fetches = upstream.metadata_fetches
+    assert ingest.ingest_youtube("recheck", db) == 0
+    assert upstream.transcript_fetches == fetches + 1
+    assert upstream.metadata_fetches == metadata_fetches
+
+    # Changed upstream: the re-check sees it despite the cached transcript.
+    upstream.text = " ".join(f"sentence {i} about batching." for i in range(90))
+    assert ingest.ingest_youtube("recheck", db) > 0
+    assert upstream.transcript_fetches == fetches + 2
+
+def test_restore_reads_the_transcript_cache(upstream, db):
+    assert ingest.ingest_youtube("cached", db) > 0
+    fetches = upstream.transcript_fetches
+
+    assert ingest.ingest_youtube("cached", db, force=True, from_cache=True) > 0
+    assert upstream.transcript_fetches == fetches
+
+class FailingEmbeddings(HashingEmbeddings):
+    def embed_documents(self, texts):
+        raise RuntimeError("embedding service down")
+
+def published(video_id):
+    with vectorstore.checkout_vectorstore(video_id) as store:
+        return store.get(where=vectorstore.video_filter(video_id), include=["embeddings"])
+
+def test_full_rebuild_swaps_stores_only_when_complete(upstream, db, monkeypatch):
+    monkeypatch.setattr(get_settings(), "INGEST_INCREMENTAL", False)
+    monkeypatch.setattr(get_settings(), "EMBED_MAX_RETRIES", 0)
+    assert ingest.ingest_youtube("rebuild", db) > 0
+    before = published("rebuild")
+
+    # A failed rebuild leaves the old store serving.
+    monkeypatch.setattr(vectorstore, "_embeddings", FailingEmbeddings())
+    with pytest.raises(Exception):
+        ingest.ingest_youtube("rebuild", db, force=True)
+    assert sorted(published("rebuild")["ids"]) == sorted(before["ids"])
+
+    # A new embedding dimension is taken by the rebuilt store.
+    monkeypatch.setattr(vectorstore, "_embeddings", HashingEmbeddings(size=64))
+    assert ingest.ingest_youtube("rebuild", db, force=True) > 0
+    after = published("rebuild")
+    assert len(after["ids"]) == len(before["ids"])
+    assert len(after["embeddings"][0]) == 64
+
+def test_evicted_video_is_restored_without_its_cached_transcript(upstream, db):
+    assert ingest.ingest_youtube("evicted", db) > 0
+    assert store_eviction.evict_video("evicted")
+
+    # The transcript cache dropped it too, and a read recreated the directory.
+    get_transcript_cache().path("evicted", "en").unlink()
+    published("evicted")
+    assert store_eviction.is_evicted("evicted")
+
+    fetches = upstream.transcript_fetches
+    store_eviction.restore_video("evicted")
+    assert upstream.transcript_fetches == fetches + 1
+    assert published("evicted")["ids"]
+    assert not store_eviction.is_evicted("evicted")
+
+def test_never_ingested_store_leaves_no_tombstone(upstream):
+    published("never")
+    assert store_eviction.evict_video("never")
+    assert not store_eviction.is_evicted("never")
+
+class CountingEmbeddings(HashingEmbeddings):
+    """
+    Records every text embedded; fails the batch after `fail_after` batches.
+    """
+
+    def __init__(self, fail_after=None):
+        super().__init__()
+        self.embedded = []
+        self.batches = 0
+        self.fail_after = fail_after
+
+    def embed_documents(self, texts):
+        if self.fail_after is not None and self.batches >= self.fail_after:
+            raise RuntimeError("embedding service down")
+        self.batches += 1
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+def sentences(topic, changed=None):
+    return " ".join(
+        f"sentence {i} about {changed if changed and i == 60 else topic}." for i in range(120)
+    )
+
+def test_incremental_reingest_embeds_only_changed_chunks(upstream, db, monkeypatch):
+    embeddings = CountingEmbeddings()
+    monkeypatch.setattr(vectorstore, "_embeddings", embeddings)
+    upstream.text = sentences("caching")
+    assert ingest.ingest_youtube("incremental", db) > 0
+    before = set(published("incremental")["ids"])
+
+    embeddings.embedded.clear()
+    upstream.text = sentences("caching", changed="batching")
+    assert ingest.ingest_youtube("incremental", db, force=True) > 0
+    after = set(published("incremental")["ids"])
+
+    added = after - before
+    assert len(added) == 1
+    assert len(before - after) == 1
+    assert len(embeddings.embedded) == 1
+    assert "sentence 60 about batching." in embeddings.embedded[0]
+
+def test_staged_chunks_are_hidden_until_published(upstream, db, monkeypatch):
+    upstream.text = sentences("caching")
+    assert ingest.ingest_youtube("staged", db) > 0
+    before = set(published("staged")["ids"])
+
+    seen = {}
+    publish = ingest.publish_chunks
+
+    def publish_and_look(store, ids, retired_ids, metadatas=None):
+        seen["all"] = set(store.get(where={"video_id": "staged"}, include=[])["ids"])
+        seen["filtered"] = set(published("staged")["ids"])
+        publish(store, ids, retired_ids, metadatas)
+
+    monkeypatch.setattr(ingest, "publish_chunks", publish_and_look)
+    upstream.text = sentences("caching", changed="batching")
+    assert ingest.ingest_youtube("staged", db, force=True) > 0
+
+    staged = seen["all"] - before
+    assert len(staged) == 1
+    assert seen["filtered"] == before
+    assert staged <= set(published("staged")["ids"])
+
+def test_failed_reingest_keeps_published_chunks_and_drops_staged(upstream, db, monkeypatch):
+    embeddings = CountingEmbeddings()
+    monkeypatch.setattr(vectorstore, "_embeddings", embeddings)
+    monkeypatch.setattr(get_settings(), "EMBED_MAX_RETRIES", 0)
+    monkeypatch.setattr(get_settings(), "EMBED_BATCH_SIZE", 2)
+    upstream.text = sentences("caching")
+    assert ingest.ingest_youtube("failing", db) > 0
+    before = published("failing")
+
+    # Every chunk changes; the service goes down after the first batch.
+    embeddings.batches, embeddings.fail_after = 0, 1
+    upstream.text = sentences("batching")
+    with pytest.raises(Exception):
+        ingest.ingest_youtube("failing", db, force=True)
+
+    assert embeddings.batches == 1
+    assert published("failing")["ids"] == before["ids"]
+    with vectorstore.checkout_vectorstore("failing") as store:
+        assert sorted(store.get(where={"video_id": "failing"}, include=[])["ids"]) == sorted(before["ids"])
+
+def test_changed_transcript_and_eviction_drop_cached_answers(upstream, db):
+    cache = get_answer_cache()
+    upstream.text = sentences("caching")
+    assert ingest.ingest_youtube("answers", db) > 0
+
+    def cached():
+        return cache.get("answers", "old-hash", "what is cached?")
+
+    # Same transcript: the cached answers stay.
+    cache.put("answers", "old-hash", "what is cached?", "old answer")
+    assert ingest.ingest_youtube("answers", db, force=True) > 0
+    assert cached() == "old answer"
+
+    upstream.text = sentences("caching", changed="batching")
+    assert ingest.ingest_youtube("answers", db, force=True) > 0
+    assert cached() is None
+
+    cache.put("answers", "old-hash", "what is cached?", "old answer")
+    assert store_eviction.evict_video("answers")
+    assert cached() is None
@@ -0,0 +1,9 @@
+from benchmarks.startup_budget import BUDGET_SECONDS, LAZY_MODULES, STARTUP_PROBE, probe
+
+def test_startup_is_lazy_and_within_budget():
+    # The first run also warms the bytecode cache; it is not counted.
+    probe(STARTUP_PROBE)
+    started = probe(STARTUP_PROBE)
+
+    assert set(LAZY_MODULES) & set(started["modules"]) == set()
+    assert started["seconds"] <= BUDGET_SECONDS
@@ -0,0 +1,161 @@
+import asyncio
+import json
+
+import pytest
+from langchain_core.output_parsers import StrOutputParser
+
+import app.services.rag as rag
+from app.core.config import get_settings
+from app.services.metrics import CHAT_REQUESTS
+from app.services.rag import build_prompt, stream_chain
+from benchmarks.fakes import FakeStreamingChatModel
+
+class TrackedChain:
+    """
+    Fake LLM chain that records how many tokens it produced and whether its
+    generation was closed (cancelled) before finishing.
+    """
+
+    def __init__(self, **model_options):
+        self.chain = build_prompt() | FakeStreamingChatModel(**model_options) | StrOutputParser()
+        self.produced = 0
+        self.finished = False
+        self.closed = False
+
+    async def astream(self, inputs):
+        inputs = {"context": "", "question": "what is cached?", **inputs}
+        try:
+            async for chunk in self.chain.astream(inputs):
+                self.produced += 1
+                yield chunk
+            self.finished = True
+        finally:
+            self.closed = True
+
+class FakeRequest:
+    def __init__(self, disconnect_after: int):
+        self.checks = 0
+        self.disconnect_after = disconnect_after
+
+    async def is_disconnected(self) -> bool:
+        self.checks += 1
+        return self.checks > self.disconnect_after
+
+def parse(event: str) -> dict:
+    return json.loads(event)
+
+def outcome_count(outcome: str) -> float:
+    return CHAT_REQUESTS.labels(outcome)._value.get()
+
+@pytest.fixture
+def stream_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "CHAT_STREAM_BUFFER", 4)
+    monkeypatch.setattr(settings, "CHAT_STREAM_IDLE_TIMEOUT_SECONDS", 5.0)
+    monkeypatch.setattr(settings, "CHAT_TIMING_EVENT", False)
+    return settings
+
+def test_streams_every_token_then_end(stream_settings):
+    chain = TrackedChain(tokens=10, token_latency_seconds=0.0, first_token_latency_seconds=0.0)
+    completed = []
+
+    async def run():
+        return [parse(e) async for e in stream_chain(chain, {}, on_complete=completed.append)]
+
+    events = asyncio.run(run())
+
+    assert [e["event"] for e in events] == ["message"] * 10 + ["end"]
+    assert completed == ["".join(e["data"] for e in events[:-1])]
+    assert chain.finished
+
+def test_client_disconnect_cancels_generation(stream_settings):
+    chain = TrackedChain(tokens=200, token_latency_seconds=0.01, first_token_latency_seconds=0.0)
+    before = outcome_count("disconnected")
+
+    async def run():
+        events = [parse(e) async for e in stream_chain(chain, {}, request=FakeRequest(disconnect_after=3))]
+        await asyncio.sleep(0.05)  # generation would carry on here if it were not cancelled
+        return events
+
+    events = asyncio.run(run())
+
+    assert [e["event"] for e in events] == ["message"] * 3
+    assert chain.closed and not chain.finished
+    assert chain.produced < 200
+    assert outcome_count("disconnected") == before + 1
+
+def test_idle_stream_times_out_with_error_event(stream_settings, monkeypatch):
+    monkeypatch.setattr(stream_settings, "CHAT_STREAM_IDLE_TIMEOUT_SECONDS", 0.1)
+    chain = TrackedChain(tokens=5, token_latency_seconds=0.0, first_token_latency_seconds=2.0)
+    before = outcome_count("timeout")
+
+    async def run():
+        return [parse(e) async for e in stream_chain(chain, {})]
+
+    events = asyncio.run(run())
+
+    assert events == [{"event": "error", "data": "Answer generation timed out"}]
+    assert chain.closed and chain.produced == 0
+    assert outcome_count("timeout") == before + 1
+
+def test_slow_client_applies_backpressure(stream_settings):
+    chain = TrackedChain(tokens=100, token_latency_seconds=0.0, first_token_latency_seconds=0.0)
+
+    async def run():
+        stream = stream_chain(chain, {})
+        consumed = []
+        async for event in stream:
+            consumed.append(parse(event))
+            # The producer may only run ahead by the queue size (plus the
+            # token it is blocked on).
+            await asyncio.sleep(0.01)
+            assert chain.produced <= len(consumed) + stream_settings.CHAT_STREAM_BUFFER + 1
+            if len(consumed) == 5:
+                break
+        await stream.aclose()
+        return consumed
+
+    consumed = asyncio.run(run())
+
+    assert len(consumed) == 5
+    assert chain.closed and not chain.finished
+
+def test_generation_errors_become_error_events(stream_settings):
+    class FailingChain:
+        async def astream(self, inputs):
+            yield "partial "
+            raise RuntimeError("model unavailable")
+
+    async def run():
+        return [parse(e) async for e in stream_chain(FailingChain(), {})]
+
+    assert asyncio.run(run()) == [
+        {"event": "message", "data": "partial "},
+        {"event": "error", "data": "model unavailable"},
+    ]
+
+class SourcingChain(TrackedChain):
+    """
+    Fake chain whose retrieval step cites every requested video.
+    """
+
+    async def astream(self, inputs):
+        inputs["sources"].extend(inputs["video_ids"])
+        async for chunk in super().astream({"question": inputs["question"]}):
+            yield chunk
+
+def test_single_video_list_still_sends_sources(stream_settings, monkeypatch):
+    chain = SourcingChain(tokens=3, token_latency_seconds=0.0, first_token_latency_seconds=0.0)
+    monkeypatch.setattr(rag, "resolve_chat_videos", lambda video_ids, playlist_id: ["only"])
+    monkeypatch.setattr(rag, "get_chain", lambda: chain)
+
+    async def run():
+        response = await rag.chat_videos(
+            request=None, username="tests", question="what is cached?", playlist_id="playlist"
+        )
+        return [parse(e) async for e in response.body_iterator]
+
+    events = asyncio.run(run())
+
+    assert events[0] == {"event": "sources", "data": ["only"]}
+    assert [e["event"] for e in events[1:]] == ["message"] * 3 + ["end"]
@@ -0,0 +1,36 @@
+import threading
+
+from app.db.transcript_cache import TranscriptCache, TranscriptSegment
+
+def segments(count):
+    return [TranscriptSegment(f"segment {i}", float(i), 1.0) for i in range(count)]
+
+def test_truncated_entry_is_a_miss(tmp_path):
+    cache = TranscriptCache(tmp_path, ttl_seconds=0, max_bytes=0)
+    cache.put("v", "en", segments(500), "manual")
+    path = cache.path("v", "en")
+    path.write_bytes(path.read_bytes()[:100])
+
+    assert cache.get("v", "en") is None
+
+def test_concurrent_writers_do_not_share_a_temporary_file(tmp_path):
+    cache = TranscriptCache(tmp_path, ttl_seconds=0, max_bytes=0)
+    barrier = threading.Barrier(8)
+    errors = []
+
+    def writer(count):
+        barrier.wait()
+        try:
+            cache.put("v", "en", segments(count), "manual")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(200 + i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(cache.get("v", "en").segments) in range(200, 208)
+    assert list(tmp_path.glob("*.tmp")) == []
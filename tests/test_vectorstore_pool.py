@@ -0,0 +1,135 @@
+import shutil
+import threading
+
+import pytest
+from chromadb.api.shared_system_client import SharedSystemClient
+from langchain_core.documents import Document
+
+import app.db.vectorstore as vectorstore
+from app.core.config import get_settings
+from app.db.vectorstore import (
+    VectorStorePool,
+    add_embedded_chunks,
+    checkout_vectorstore,
+    read_generation,
+    video_store_path,
+)
+from benchmarks.fakes import HashingEmbeddings
+
+class Handle:
+    def __init__(self, name):
+        self.name = name
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = VectorStorePool(max_size=4, ttl_seconds=0)
+    monkeypatch.setattr(vectorstore, "_pool", pool)
+    monkeypatch.setattr(vectorstore, "_embeddings", HashingEmbeddings())
+    return pool
+
+def video_systems() -> set:
+    root = str(get_settings().CHROMA_DIR)
+    return {
+        identifier for identifier in SharedSystemClient._identifier_to_system
+        if identifier.startswith(root) and "video_pool" in identifier
+    }
+
+def test_live_chroma_systems_stay_bounded(pool):
+    for i in range(30):
+        with checkout_vectorstore(f"pool{i}") as store:
+            store.get(limit=1)
+
+    assert len(video_systems()) <= pool.max_size
+    assert pool.stats()["evictions"] == 30 - pool.max_size
+
+def test_evicted_handle_is_closed_after_its_last_borrower():
+    released = []
+    pool = VectorStorePool(max_size=1, ttl_seconds=0)
+
+    def checkout(key):
+        return pool.checkout(key, lambda: Handle(key), release=lambda: released.append(key))
+
+    with checkout("a"):
+        with checkout("b"):
+            pass
+        # "a" was evicted while borrowed: not closed yet.
+        assert released == []
+    assert released == ["a"]
+
+def test_draining_handle_is_reused_not_reopened():
+    opened, released = [], []
+    pool = VectorStorePool(max_size=1, ttl_seconds=0)
+
+    def checkout(key):
+        def factory():
+            opened.append(key)
+            return Handle(key)
+        return pool.checkout(key, factory, release=lambda: released.append(key))
+
+    with checkout("a") as first:
+        with checkout("b"):
+            pass
+        # Checked out again while still borrowed: the same handle comes back.
+        with checkout("a") as second:
+            assert second is first
+
+    assert opened == ["a", "b"]
+    assert released == ["b"]
+
+def test_new_version_retires_the_old_handle():
+    released = []
+    pool = VectorStorePool(max_size=4, ttl_seconds=0)
+
+    def checkout(version):
+        return pool.checkout(
+            "a", lambda: Handle(version), version=version, release=lambda: released.append(version)
+        )
+
+    with checkout(1) as old:
+        with checkout(2) as new:
+            assert new is not old
+        assert released == []
+    assert released == [1]
+
+def test_concurrent_checkouts_share_one_handle():
+    pool = VectorStorePool(max_size=4, ttl_seconds=0)
+    barrier = threading.Barrier(8)
+    handles = []
+
+    def worker():
+        barrier.wait()
+        with pool.checkout("a", lambda: Handle("a")) as handle:
+            handles.append(handle)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(handles) == 8
+    assert pool.stats()["size"] == 1
+    assert pool.stats()["draining"] == 0
+
+def test_store_replaced_by_another_process_is_reopened(pool):
+    def write(chunk_id):
+        with checkout_vectorstore("replaced") as store:
+            doc = Document(page_content=chunk_id, metadata={"video_id": "replaced"})
+            add_embedded_chunks(store, [chunk_id], [doc], [HashingEmbeddings().embed_query(chunk_id)])
+
+    def stored_ids():
+        with checkout_vectorstore("replaced") as store:
+            return store.get(include=[])["ids"]
+
+    write("old")
+    path = video_store_path("replaced")
+    old_generation = read_generation(path)
+
+    # Another worker evicts the store: this process's pooled handle is stale.
+    shutil.rmtree(path)
+
+    assert stored_ids() == []
+    write("new")
+    assert read_generation(path) != old_generation
+    assert stored_ids() == ["new"]
+    assert old_generation not in {identifier.rsplit("/", 1)[-1] for identifier in video_systems()}